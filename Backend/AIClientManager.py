@@ -1,18 +1,27 @@
 #!/usr/bin/env python3
 """
 AI Client Manager with Multi-API Fallback Support
-Handles multiple Groq API keys and automatic fallback to Gemini API
+Handles multiple Groq API keys and automatic fallback to Gemini, Cohere and a local LLM server
 """
 
 import os
+import re
+import json
 import time
+import hashlib
 import logging
-from typing import Optional, List, Dict, Any
+import threading
+from typing import Optional, List, Dict, Any, Callable, Iterator
 from dotenv import load_dotenv
 from groq import Groq
 import google.generativeai as genai
 from cohere import Client as CohereClient
 
+from .ConnectionPool import get_http_client, get_session
+from .LatencyRouter import LatencyRouter
+from .Cancellation import CancellationToken, QueryCancelled
+from .Replay import transport
+
 # Load environment variables
 load_dotenv()
 
@@ -20,34 +29,140 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Static provider priority and the model each fallback provider uses
+PROVIDER_ORDER = ['groq', 'gemini', 'cohere']
+FALLBACK_MODELS = {
+    'gemini': 'gemini-1.5-flash',
+    'cohere': 'command-r-plus'
+}
+
+# Local OpenAI-compatible server (llama.cpp server, LocalLLMStub, ...)
+# LOCAL_LLM_MODE: 'fallback' = last resort, 'short' = first choice for short queries, 'off'
+LOCAL_LLM_MODE = os.getenv('LOCAL_LLM_MODE', 'fallback').lower()
+LOCAL_LLM_MODEL = os.getenv('LOCAL_LLM_MODEL', 'local')
+LOCAL_LLM_SHORT_QUERY_CHARS = int(os.getenv('LOCAL_LLM_SHORT_QUERY_CHARS', '80'))
+LOCAL_LLM_HEALTH_TTL = float(os.getenv('LOCAL_LLM_HEALTH_TTL', '30'))
+
+# Returned when every provider fails
+UNAVAILABLE_MESSAGE = "I'm sorry, all AI services are currently unavailable. Please try again later."
+
+# Clock readings callers put into system prompts (Chatbot.Information): "Time: 14 hours :05 minutes :09 seconds."
+# They change every second, so they are left out of the coalescing key
+VOLATILE_TEXT = re.compile(r'^Time:.*$|\b\d{1,2}:\d{2}:\d{2}\b', re.MULTILINE)
+
+class StreamInterrupted(RuntimeError):
+    """
+    A provider failed after some of its tokens had already been delivered.
+    Falling back would stream a second answer after the first one's beginning, so the chain stops.
+    """
+
+    def __init__(self, provider: str, partial: str):
+        super().__init__(f"{provider} stream failed after {len(partial)} characters")
+        self.provider = provider
+        self.partial = partial
+
+# Result published to followers when the leader's query is cancelled before it finished
+LEADER_CANCELLED = object()
+
+class _InFlightCall:
+    """
+    A completion request currently being served by a leader thread.
+    Followers replay every token streamed so far and then wait for the rest.
+    """
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.result: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self.done = False
+        self.condition = threading.Condition()
+
+    def push(self, token: str):
+        """Appends a streamed token and wakes up waiting followers."""
+        with self.condition:
+            self.tokens.append(token)
+            self.condition.notify_all()
+
+    def finish(self, result: str, error: Optional[Exception] = None):
+        """Publishes the final answer, or the error that ended the call, to all followers."""
+        with self.condition:
+            self.result = result
+            self.error = error
+            self.done = True
+            self.condition.notify_all()
+
+    def iter_tokens(self, cancel_token: Optional[CancellationToken] = None) -> Iterator[str]:
+        """Yields every token of the call, including ones streamed before attaching."""
+        index = 0
+        while True:
+            with self.condition:
+                while index >= len(self.tokens) and not self.done:
+                    self.condition.wait(0.05)
+                    if cancel_token:
+                        cancel_token.raise_if_cancelled()
+                if index >= len(self.tokens):
+                    return
+                token = self.tokens[index]
+            index += 1
+            yield token
+
+    def wait(self, cancel_token: Optional[CancellationToken] = None) -> str:
+        """Blocks until the leader finishes and returns its answer."""
+        with self.condition:
+            while not self.done:
+                self.condition.wait(0.05)
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+            if self.error:
+                raise self.error
+            return self.result
+
 class AIClientManager:
     """
     Manages multiple AI API clients with automatic fallback support.
-    Priority: Groq (multiple keys) -> Gemini -> Cohere
+    Priority: Groq (multiple keys) -> Gemini -> Cohere -> Local
     """
 
     def __init__(self):
         self.groq_clients = self._initialize_groq_clients()
         self.gemini_client = self._initialize_gemini_client()
         self.cohere_client = self._initialize_cohere_client()
+        self.local_url = self._initialize_local_client()
 
         # Track API health and usage
         self.api_health = {
             'groq': True,
             'gemini': True,
-            'cohere': True
+            'cohere': True,
+            'local': True
         }
 
         self.failure_counts = {
             'groq': 0,
             'gemini': 0,
-            'cohere': 0
+            'cohere': 0,
+            'local': 0
         }
 
+        # Cached result of the local server health check: (healthy, checked_at)
+        self._local_health = (False, 0.0)
+
         # Circuit breaker settings
         self.max_failures = 3
         self.circuit_timeout = 300  # 5 minutes
 
+        # Single-flight coalescing of identical in-flight requests
+        self._inflight: Dict[str, _InFlightCall] = {}
+        self._inflight_lock = threading.Lock()
+        self.metrics = {
+            'requests': 0,
+            'api_calls': 0,
+            'coalesced': 0
+        }
+
+        # Adaptive routing based on live latency
+        self.router = LatencyRouter()
+
     def _initialize_groq_clients(self) -> List[Groq]:
         """Initialize multiple Groq clients from API keys."""
         groq_clients = []
@@ -58,7 +173,7 @@ class AIClientManager:
             groq_keys = [key.strip() for key in groq_keys_str.split(',') if key.strip()]
             for key in groq_keys:
                 try:
-                    client = Groq(api_key=key)
+                    client = Groq(api_key=key, http_client=get_http_client())
                     groq_clients.append(client)
                     logger.info(f"Initialized Groq client with key ending in ...{key[-4:]}")
                 except Exception as e:
@@ -89,7 +204,7 @@ class AIClientManager:
         try:
             cohere_key = os.getenv('CohereAPI')
             if cohere_key:
-                client = CohereClient(api_key=cohere_key)
+                client = CohereClient(api_key=cohere_key, httpx_client=get_http_client())
                 logger.info("Initialized Cohere API client")
                 return client
             else:
@@ -99,6 +214,33 @@ class AIClientManager:
             logger.error(f"Failed to initialize Cohere client: {e}")
             return None
 
+    def _initialize_local_client(self) -> Optional[str]:
+        """Read the base URL of the local OpenAI-compatible server."""
+        local_url = os.getenv('LOCAL_LLM_URL', '').rstrip('/')
+        if local_url and LOCAL_LLM_MODE != 'off':
+            logger.info(f"Configured local LLM provider at {local_url} (mode: {LOCAL_LLM_MODE})")
+            return local_url
+        return None
+
+    def local_health_check(self, force: bool = False) -> bool:
+        """Check that the local server answers /models, caching the result briefly."""
+        if not self.local_url:
+            return False
+
+        healthy, checked_at = self._local_health
+        if not force and time.time() - checked_at < LOCAL_LLM_HEALTH_TTL:
+            return healthy
+
+        try:
+            response = get_session().get(f"{self.local_url}/models", timeout=2)
+            healthy = response.status_code == 200
+        except Exception as e:
+            logger.warning(f"Local LLM health check failed: {e}")
+            healthy = False
+
+        self._local_health = (healthy, time.time())
+        return healthy
+
     def _is_circuit_open(self, api_name: str) -> bool:
         """Check if circuit breaker is open for an API."""
         if self.failure_counts[api_name] >= self.max_failures:
@@ -129,19 +271,27 @@ class AIClientManager:
 
     def groq_completion(self, messages: List[Dict], model: str = 'llama-3.3-70b-versatile',
                        temperature: float = 0.3, max_tokens: int = 2048,
-                       stream: bool = True, **kwargs) -> Optional[str]:
+                       stream: bool = True, on_token: Optional[Callable[[str], None]] = None,
+                       cancel_token: Optional[CancellationToken] = None, **kwargs) -> Optional[str]:
         """
         Try Groq API with multiple keys, return response or None if all fail.
+        Streamed tokens are passed to on_token as they arrive; cancelling the token
+        closes the stream and raises QueryCancelled. A stream that fails after delivering
+        tokens raises StreamInterrupted instead of retrying with the next key.
         """
         if not self.groq_clients or self._is_circuit_open('groq'):
             logger.warning("Groq API unavailable (circuit breaker open or no clients)")
             return None
 
         for i, client in enumerate(self.groq_clients):
+            unregister = lambda: None
+            answer = ''
             try:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
                 logger.info(f"Trying Groq client {i+1}/{len(self.groq_clients)}")
 
-                completion = client.chat.completions.create(
+                create = lambda: client.chat.completions.create(
                     model=model,
                     messages=messages,
                     temperature=temperature,
@@ -149,23 +299,50 @@ class AIClientManager:
                     stream=stream,
                     **kwargs
                 )
+                request = {'model': model, 'messages': messages, 'temperature': temperature,
+                           'max_tokens': max_tokens, **kwargs}
 
                 if stream:
+                    def live_tokens():
+                        nonlocal unregister
+                        completion = create()
+                        if cancel_token:
+                            unregister = cancel_token.on_cancel(completion.close)
+                        for chunk in completion:
+                            if chunk.choices[0].delta.content:
+                                yield chunk.choices[0].delta.content
+
                     answer = ''
-                    for chunk in completion:
-                        if chunk.choices[0].delta.content:
-                            answer += chunk.choices[0].delta.content
+                    for content in transport.stream('groq', request, live_tokens):
+                        if cancel_token:
+                            cancel_token.raise_if_cancelled()
+                        answer += content
+                        if on_token:
+                            on_token(content)
                     answer = answer.strip().replace('</s>', '')
                 else:
-                    answer = completion.choices[0].message.content
+                    answer = transport.call('groq', request, lambda: create().choices[0].message.content)
+                    if on_token:
+                        on_token(answer)
 
                 self._record_success('groq')
                 logger.info(f"Groq client {i+1} succeeded")
                 return answer
 
+            except QueryCancelled:
+                raise
             except Exception as e:
+                # Closing the stream on cancellation surfaces as a read error
+                if cancel_token and cancel_token.cancelled:
+                    raise QueryCancelled()
+                if answer:
+                    logger.error(f"Groq client {i+1} failed mid-stream: {e}")
+                    self._record_failure('groq')
+                    raise StreamInterrupted('groq', answer) from e
                 logger.warning(f"Groq client {i+1} failed: {e}")
                 continue
+            finally:
+                unregister()
 
         # All Groq clients failed
         self._record_failure('groq')
@@ -173,7 +350,8 @@ class AIClientManager:
         return None
 
     def gemini_completion(self, prompt: str, model: str = 'gemini-1.5-flash',
-                         temperature: float = 0.3, max_tokens: int = 2048) -> Optional[str]:
+                         temperature: float = 0.3, max_tokens: int = 2048,
+                         on_token: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """
         Try Gemini API as fallback.
         """
@@ -185,15 +363,19 @@ class AIClientManager:
             logger.info("Trying Gemini API")
 
             model_instance = self.gemini_client.GenerativeModel(model)
-            response = model_instance.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_tokens,
-                )
-            )
-
-            answer = response.text.strip()
+            answer = transport.call(
+                'gemini',
+                {'model': model, 'prompt': prompt, 'temperature': temperature, 'max_tokens': max_tokens},
+                lambda: model_instance.generate_content(
+                    prompt,
+                    generation_config=genai.types.GenerationConfig(
+                        temperature=temperature,
+                        max_output_tokens=max_tokens,
+                    )
+                ).text
+            ).strip()
+            if on_token:
+                on_token(answer)
             self._record_success('gemini')
             logger.info("Gemini API succeeded")
             return answer
@@ -204,7 +386,8 @@ class AIClientManager:
             return None
 
     def cohere_completion(self, prompt: str, model: str = 'command-r-plus',
-                         temperature: float = 0.3, max_tokens: int = 2048) -> Optional[str]:
+                         temperature: float = 0.3, max_tokens: int = 2048,
+                         on_token: Optional[Callable[[str], None]] = None) -> Optional[str]:
         """
         Try Cohere API as final fallback.
         """
@@ -215,14 +398,18 @@ class AIClientManager:
         try:
             logger.info("Trying Cohere API")
 
-            response = self.cohere_client.generate(
-                model=model,
-                prompt=prompt,
-                max_tokens=max_tokens,
-                temperature=temperature,
-            )
-
-            answer = response.generations[0].text.strip()
+            answer = transport.call(
+                'cohere',
+                {'model': model, 'prompt': prompt, 'temperature': temperature, 'max_tokens': max_tokens},
+                lambda: self.cohere_client.generate(
+                    model=model,
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                ).generations[0].text
+            ).strip()
+            if on_token:
+                on_token(answer)
             self._record_success('cohere')
             logger.info("Cohere API succeeded")
             return answer
@@ -232,40 +419,286 @@ class AIClientManager:
             self._record_failure('cohere')
             return None
 
+    def local_completion(self, messages: List[Dict], model: str = LOCAL_LLM_MODEL,
+                         temperature: float = 0.3, max_tokens: int = 2048,
+                         stream: bool = True,
+                         on_token: Optional[Callable[[str], None]] = None,
+                         cancel_token: Optional[CancellationToken] = None) -> Optional[str]:
+        """
+        Try the local OpenAI-compatible server, for offline use or low latency.
+        Raises StreamInterrupted if the stream fails after delivering tokens.
+        """
+        if not self.local_url or self._is_circuit_open('local') or not self.local_health_check():
+            logger.warning("Local LLM unavailable")
+            return None
+
+        unregister = lambda: None
+        answer = ''
+        try:
+            logger.info("Trying local LLM")
+
+            response = get_session().post(
+                f"{self.local_url}/chat/completions",
+                json={
+                    'model': model,
+                    'messages': messages,
+                    'temperature': temperature,
+                    'max_tokens': max_tokens,
+                    'stream': stream
+                },
+                stream=stream,
+                timeout=60
+            )
+            response.raise_for_status()
+
+            if stream:
+                if cancel_token:
+                    unregister = cancel_token.on_cancel(response.close)
+                answer = ''
+                # Server-sent events: "data: {chunk}" lines terminated by "data: [DONE]"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    if cancel_token:
+                        cancel_token.raise_if_cancelled()
+                    content = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                    if content:
+                        answer += content
+                        if on_token:
+                            on_token(content)
+                response.close()
+                answer = answer.strip()
+            else:
+                answer = response.json()['choices'][0]['message']['content'].strip()
+                if on_token:
+                    on_token(answer)
+
+            self._record_success('local')
+            logger.info("Local LLM succeeded")
+            return answer
+
+        except QueryCancelled:
+            raise
+        except Exception as e:
+            if cancel_token and cancel_token.cancelled:
+                raise QueryCancelled()
+            logger.error(f"Local LLM failed: {e}")
+            self._record_failure('local')
+            self._local_health = (False, time.time())
+            if answer:
+                raise StreamInterrupted('local', answer) from e
+            return None
+        finally:
+            unregister()
+
+    def _request_key(self, messages: List[Dict], prompt: Optional[str], model: str,
+                     temperature: float, max_tokens: int, stream: bool) -> str:
+        """
+        Builds a key identifying a completion request: the normalized question, the model and
+        its parameters, and a digest of the conversation before it. Clock readings in system
+        prompts are dropped, and repeats of the pending question at the end of the history
+        (the same question logged again while the first is answered) are collapsed.
+        """
+        def normalize(text) -> str:
+            return ' '.join(str(text).lower().split())
+
+        turns = [dict(msg) for msg in messages]
+        question = prompt
+        if turns and turns[-1].get('role') == 'user':
+            question = turns[-1]['content']
+            while turns and turns[-1].get('role') == 'user' and normalize(turns[-1]['content']) == normalize(question):
+                turns.pop()
+        for msg in turns:
+            if msg.get('role') == 'system':
+                msg['content'] = VOLATILE_TEXT.sub('', str(msg.get('content', '')))
+
+        history = hashlib.sha256(json.dumps(turns, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        payload = json.dumps([normalize(question or ''), history, model, temperature, max_tokens, stream],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
     def get_completion_with_fallback(self, messages: List[Dict], prompt: str = None,
                                    model: str = 'llama-3.3-70b-versatile',
                                    temperature: float = 0.3, max_tokens: int = 2048,
-                                   stream: bool = True) -> str:
+                                   stream: bool = True,
+                                   on_token: Optional[Callable[[str], None]] = None,
+                                   latency_target: Optional[float] = None,
+                                   cancel_token: Optional[CancellationToken] = None) -> str:
         """
-        Get completion with automatic fallback: Groq -> Gemini -> Cohere
+        Get completion with automatic fallback: Groq -> Gemini -> Cohere.
+        The latency router may move the provider most likely to meet latency_target
+        (seconds to first token) to the front; the rest keep their static order.
+        Identical requests arriving while one is in flight attach to it instead of
+        issuing their own API call, and receive every token it streams.
+        If the leader is cancelled, its followers issue the request again themselves.
+        Raises QueryCancelled once cancel_token is cancelled, and StreamInterrupted when a
+        provider fails after streaming part of its answer.
         """
+        key = self._request_key(messages, prompt, model, temperature, max_tokens, stream)
+
+        with self._inflight_lock:
+            self.metrics['requests'] += 1
+
+        while True:
+            with self._inflight_lock:
+                call = self._inflight.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = _InFlightCall()
+                    self._inflight[key] = call
+                    self.metrics['api_calls'] += 1
+                else:
+                    self.metrics['coalesced'] += 1
+            if is_leader:
+                break
+
+            logger.info("Attached to identical in-flight request")
+            delivered = []
+            if on_token:
+                for token in call.iter_tokens(cancel_token):
+                    delivered.append(token)
+                    on_token(token)
+            answer = call.wait(cancel_token)
+            if answer is not LEADER_CANCELLED:
+                return answer
+            if delivered:
+                # A new request would stream a different answer after the tokens already passed on
+                raise StreamInterrupted('coalesced', ''.join(delivered))
+            logger.info("Leader of the in-flight request was cancelled, retrying")
+
+        def forward(token: str):
+            call.push(token)
+            if on_token:
+                on_token(token)
+
+        answer, error = UNAVAILABLE_MESSAGE, None
+        try:
+            answer = self._complete(messages, prompt, model, temperature, max_tokens, stream, forward,
+                                    latency_target, cancel_token)
+            return answer
+        except QueryCancelled:
+            answer = LEADER_CANCELLED
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            call.finish(answer, error)
+
+    def _is_available(self, api_name: str) -> bool:
+        """Check if a provider has a client and a closed circuit breaker."""
+        clients = {
+            'groq': self.groq_clients,
+            'gemini': self.gemini_client,
+            'cohere': self.cohere_client,
+            'local': self.local_url
+        }
+        return bool(clients[api_name]) and not self._is_circuit_open(api_name)
+
+    def _call_provider(self, api_name: str, model: str, messages: List[Dict], prompt: str,
+                       temperature: float, max_tokens: int, stream: bool,
+                       on_token: Callable[[str], None],
+                       cancel_token: Optional[CancellationToken] = None) -> Optional[str]:
+        """Calls one provider and records its latency with the router."""
+        start = time.time()
+        first_token_at = []
+        token_count = [0]
+
+        def timed(token: str):
+            if not first_token_at:
+                first_token_at.append(time.time())
+            token_count[0] += 1
+            on_token(token)
+
+        try:
+            if api_name == 'groq':
+                answer = self.groq_completion(messages, model, temperature, max_tokens, stream, timed,
+                                              cancel_token=cancel_token)
+            elif api_name == 'gemini':
+                answer = self.gemini_completion(prompt, model, temperature, max_tokens, timed)
+            elif api_name == 'cohere':
+                answer = self.cohere_completion(prompt, model, temperature, max_tokens, timed)
+            else:
+                local_messages = messages or [{'role': 'user', 'content': prompt}]
+                answer = self.local_completion(local_messages, model, temperature, max_tokens, stream, timed,
+                                               cancel_token)
+        except StreamInterrupted:
+            self.router.record_failure(api_name, model)
+            raise
+
+        # Non-streaming providers cannot be interrupted; their late answer is discarded
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        if answer:
+            total_time = time.time() - start
+            ttft = first_token_at[0] - start if first_token_at else total_time
+            # Non-streaming providers deliver the whole answer as one token
+            tokens = token_count[0] if token_count[0] > 1 else int(len(answer.split()) * 1.3)
+            self.router.record(api_name, model, ttft, tokens, total_time)
+        else:
+            self.router.record_failure(api_name, model)
+        return answer
+
+    def _complete(self, messages: List[Dict], prompt: Optional[str], model: str,
+                  temperature: float, max_tokens: int, stream: bool,
+                  on_token: Callable[[str], None], latency_target: Optional[float] = None,
+                  cancel_token: Optional[CancellationToken] = None) -> str:
+        """Runs the provider fallback chain for a single request."""
         # Convert messages to prompt if needed for non-Groq APIs
         if prompt is None and messages:
             prompt = "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages])
 
-        # Try Groq first (with multiple keys)
-        answer = self.groq_completion(messages, model, temperature, max_tokens, stream)
-        if answer:
-            return answer
+        candidates = [(name, FALLBACK_MODELS.get(name, model)) for name in PROVIDER_ORDER if self._is_available(name)]
+        order, reason = self.router.rank(candidates, latency_target) if candidates else ([], 'no cloud providers available')
 
-        # Fallback to Gemini
-        answer = self.gemini_completion(prompt, 'gemini-1.5-flash', temperature, max_tokens)
-        if answer:
-            return answer
+        # The local server answers short queries first, or is the last resort
+        if self._is_available('local'):
+            local = ('local', LOCAL_LLM_MODEL)
+            last_user = next((msg['content'] for msg in reversed(messages) if msg.get('role') == 'user'), prompt or '')
+            if LOCAL_LLM_MODE == 'short' and len(str(last_user)) <= LOCAL_LLM_SHORT_QUERY_CHARS:
+                order, reason = [local] + order, f"short query ({len(str(last_user))} chars) sent to local LLM"
+            else:
+                order = order + [local]
 
-        # Final fallback to Cohere
-        answer = self.cohere_completion(prompt, 'command-r-plus', temperature, max_tokens)
-        if answer:
-            return answer
+        if not order:
+            logger.error("No AI providers available")
+            return UNAVAILABLE_MESSAGE
+
+        logger.info(f"Router chose {order[0][0]}/{order[0][1]}: {reason}")
+
+        for api_name, api_model in order:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            answer = self._call_provider(api_name, api_model, messages, prompt,
+                                         temperature, max_tokens, stream, on_token, cancel_token)
+            if answer:
+                return answer
 
         # All APIs failed
-        return "I'm sorry, all AI services are currently unavailable. Please try again later."
+        return UNAVAILABLE_MESSAGE
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Returns request counters, including how many calls were coalesced."""
+        with self._inflight_lock:
+            return dict(self.metrics, in_flight=len(self._inflight))
+
+    def get_router_stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns the router's rolling latency statistics per provider/model."""
+        return self.router.snapshot()
 
 # Global instance
 ai_manager = AIClientManager()
 
 def get_ai_response(messages: List[Dict], model: str = 'llama-3.3-70b-versatile',
-                   temperature: float = 0.3, max_tokens: int = 2048, stream: bool = True) -> str:
+                   temperature: float = 0.3, max_tokens: int = 2048, stream: bool = True,
+                   on_token: Optional[Callable[[str], None]] = None,
+                   latency_target: Optional[float] = None,
+                   cancel_token: Optional[CancellationToken] = None) -> str:
     """
     Convenience function to get AI response with automatic fallback.
     """
@@ -274,7 +707,10 @@ def get_ai_response(messages: List[Dict], model: str = 'llama-3.3-70b-versatile'
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
-        stream=stream
+        stream=stream,
+        on_token=on_token,
+        latency_target=latency_target,
+        cancel_token=cancel_token
     )
 
 def get_ai_response_from_prompt(prompt: str, model: str = 'llama-3.3-70b-versatile',
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Acknowledgment Cues
+Plays a short pre-rendered filler phrase right after a final transcript while slow work runs
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+from .TTS import CachedSpeech, RegisterFrequentPhrases
+from .AudioPlayer import audio_player, PRIORITY_CUE
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ACK_ENABLED = os.getenv('ACK_ENABLED', 'true').lower() != 'false'
+ACK_DELAY = float(os.getenv('ACK_DELAY', '0.1'))  # seconds after the transcript
+ACK_FAST_THRESHOLD = float(os.getenv('ACK_FAST_THRESHOLD', '1.0'))  # intents answering faster get no cue
+ACK_CUE_FILE = os.getenv('ACK_CUE_FILE', '')  # optional chime used when an intent has no phrases
+
+# Filler phrases per intent class; an empty list means no cue. Override with ACK_PHRASES (JSON).
+ACK_PHRASES: Dict[str, List[str]] = {
+    'general': ['Let me think.', 'Hmm, one moment.'],
+    'realtime': ['Let me check that.', 'One moment, looking that up.'],
+    'image': ['Generating your images now.'],
+    'email': ['Checking your inbox.'],
+    'automation': [],
+}
+
+
+def load_phrase_overrides(raw: str) -> Dict[str, List[str]]:
+    """
+    Parses the ACK_PHRASES override: a JSON object mapping intents to lists of phrases.
+    Malformed JSON and entries that are not lists of strings are logged and ignored.
+    """
+    try:
+        overrides = json.loads(raw or '{}')
+    except json.JSONDecodeError as e:
+        logger.warning(f"Ignoring ACK_PHRASES, not valid JSON: {e}")
+        return {}
+    if not isinstance(overrides, dict):
+        logger.warning("Ignoring ACK_PHRASES, expected a JSON object of intent -> phrases")
+        return {}
+
+    valid = {}
+    for intent, phrases in overrides.items():
+        if isinstance(phrases, list) and all(isinstance(phrase, str) for phrase in phrases):
+            valid[intent] = phrases
+        else:
+            logger.warning(f"Ignoring ACK_PHRASES entry {intent!r}, expected a list of strings")
+    return valid
+
+
+ACK_PHRASES.update(load_phrase_overrides(os.getenv('ACK_PHRASES', '{}')))
+
+INTENT_KEYWORDS = {
+    'image': ['image', 'picture', 'photo', 'draw'],
+    'email': ['email', 'e-mail', 'mail', 'inbox'],
+    'realtime': ['price', 'rate', 'weather', 'news', 'today', 'latest', 'current', 'search',
+                 'score', 'stock', 'bitcoin', 'gold', 'exchange'],
+    'automation': ['open', 'close', 'play', 'mute', 'unmute', 'volume', 'shutdown', 'restart',
+                   'minimise', 'minimize', 'lock', 'wifi', 'wi-fi', 'bluetooth', 'battery'],
+}
+
+RegisterFrequentPhrases([phrase for phrases in ACK_PHRASES.values() for phrase in phrases])
+
+
+def classify_intent(transcript: str) -> str:
+    """Cheap keyword guess of the intent class, available before the decision model answers."""
+    words = transcript.lower().split()
+    if not words:
+        return 'general'
+    if words[0] in INTENT_KEYWORDS['automation']:
+        return 'automation'
+    text = ' '.join(words)
+    for intent in ('image', 'email', 'realtime'):
+        if any(keyword in text for keyword in INTENT_KEYWORDS[intent]):
+            return intent
+    return 'general'
+
+
+class Acknowledger:
+    """
+    Schedules a filler cue ACK_DELAY after a transcript. The cue is skipped when real speech
+    starts first, or when the intent class has recently been answering faster than
+    ACK_FAST_THRESHOLD; a cue still playing is dropped as soon as real speech is queued.
+    """
+
+    def __init__(self):
+        self.latency: Dict[str, float] = {}  # intent -> moving average seconds to first speech
+        self.played = 0
+        self.suppressed = 0
+        self._started_at = 0.0
+        self._intent: Optional[str] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def start(self, transcript: str) -> str:
+        """Arms the cue for a new final transcript and returns the guessed intent class."""
+        intent = classify_intent(transcript)
+        with self._lock:
+            self._cancel_timer()
+            self._started_at = time.time()
+            self._intent = intent
+            if ACK_ENABLED:
+                self._timer = threading.Timer(ACK_DELAY, self._fire, args=(self._started_at, intent))
+                self._timer.daemon = True
+                self._timer.start()
+        return intent
+
+    def finish(self) -> None:
+        """Ends the current query and learns how long its intent took to produce speech."""
+        with self._lock:
+            self._cancel_timer()
+            if self._intent and audio_player.last_speech_at > self._started_at:
+                elapsed = audio_player.last_speech_at - self._started_at
+                previous = self.latency.get(self._intent)
+                self.latency[self._intent] = elapsed if previous is None else 0.7 * previous + 0.3 * elapsed
+            self._intent = None
+
+    def _cancel_timer(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _cue_audio(self, intent: str) -> Optional[bytes]:
+        phrases = ACK_PHRASES.get(intent, [])
+        if phrases:
+            return CachedSpeech(random.choice(phrases))
+        if ACK_CUE_FILE and intent != 'automation' and os.path.exists(ACK_CUE_FILE):
+            with open(ACK_CUE_FILE, 'rb') as f:
+                return f.read()
+        return None
+
+    def _fire(self, started_at: float, intent: str) -> None:
+        with self._lock:
+            if started_at != self._started_at:
+                return
+            if audio_player.last_speech_at > started_at or self.latency.get(intent, float('inf')) < ACK_FAST_THRESHOLD:
+                self.suppressed += 1
+                return
+
+        data = self._cue_audio(intent)
+        if data is None:
+            self.suppressed += 1
+            return
+        audio_player.play(data, priority=PRIORITY_CUE)
+        self.played += 1
+        logger.info(f"Played acknowledgment cue for {intent} query")
+
+    def stats(self) -> dict:
+        """Returns cue counters and learned per-intent latencies."""
+        return {'played': self.played, 'suppressed': self.suppressed, 'latency': dict(self.latency)}
+
+
+# Global instance
+acknowledger = Acknowledger()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Audio Playback Service
+A single long-lived player that keeps the audio device open and plays a priority queue of audio buffers
+"""
+
+import io
+import os
+import time
+import heapq
+import logging
+import threading
+import itertools
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+import pygame
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Lower value = more urgent
+PRIORITY_ALERT = 0
+PRIORITY_SPEECH = 1
+PRIORITY_CUE = 2
+
+DUCK_VOLUME = float(os.getenv('AUDIO_DUCK_VOLUME', '0.3'))
+
+
+class AudioDeviceError(RuntimeError):
+    """The audio device could not be opened."""
+
+
+class PygameSink:
+    """Audio output through two pygame mixer channels: 'main' and 'overlay'."""
+
+    def open(self) -> None:
+        pygame.mixer.init()
+        pygame.mixer.set_num_channels(max(2, pygame.mixer.get_num_channels()))
+        self._channels = {'main': pygame.mixer.Channel(0), 'overlay': pygame.mixer.Channel(1)}
+
+    def close(self) -> None:
+        pygame.mixer.quit()
+
+    def decode(self, data: bytes):
+        return pygame.mixer.Sound(file=io.BytesIO(data))
+
+    def length(self, sound) -> float:
+        return sound.get_length()
+
+    def play(self, channel: str, sound) -> None:
+        self._channels[channel].play(sound)
+
+    def queue(self, channel: str, sound) -> None:
+        self._channels[channel].queue(sound)
+
+    def busy(self, channel: str) -> bool:
+        return self._channels[channel].get_busy()
+
+    def has_queued(self, channel: str) -> bool:
+        return self._channels[channel].get_queue() is not None
+
+    def stop(self, channel: str) -> None:
+        self._channels[channel].stop()
+
+    def set_volume(self, channel: str, volume: float) -> None:
+        self._channels[channel].set_volume(volume)
+
+
+class PlaybackHandle:
+    """
+    One utterance in the playback queue. Chunks can keep arriving after it was queued
+    (streamed speech); they are played back to back without gaps.
+    """
+
+    def __init__(self, player: 'AudioPlayer', priority: int, preempt: bool):
+        self.player = player
+        self.priority = priority
+        self.preempt = preempt
+        self.chunks: Deque = deque()
+        self.closed = False
+        self.cancelled = False
+        self.started = threading.Event()
+        self.started_at: Optional[float] = None  # time.perf_counter() when the first chunk played
+        self.duration = 0.0  # seconds of audio added so far
+        self.has_audio = False
+        self.done = threading.Event()
+
+    def add(self, data: bytes) -> None:
+        """Decodes an audio buffer and appends it to the utterance."""
+        if self.cancelled or not data:
+            return
+        try:
+            sound = self.player.sink.decode(data)
+        except Exception as e:
+            logger.error(f"Could not decode audio chunk: {e}")
+            return
+        if not self.has_audio:
+            self.has_audio = True
+            self.player._audio_queued(self)
+        self.chunks.append(sound)
+        self.duration += self.player.sink.length(sound)
+
+    def close(self) -> None:
+        """Marks that no more chunks will be added."""
+        self.closed = True
+
+    def cancel(self) -> None:
+        """Stops the utterance, whether it is queued or playing."""
+        self.cancelled = True
+        self.chunks.clear()
+
+    def wait(self, func: Callable = lambda r=None: True, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the utterance finished. func is polled while waiting and cancels the
+        utterance when it returns False. Returns True if it played to the end.
+        """
+        waited = 0.0
+        while not self.done.wait(0.05):
+            if not func():
+                self.cancel()
+            waited += 0.05
+            if timeout is not None and waited >= timeout:
+                return False
+        return not self.cancelled
+
+
+class AudioPlayer:
+    """
+    Plays queued utterances one at a time on the main channel. A more urgent utterance
+    either preempts the current one or plays on the overlay channel while the current
+    one is ducked.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink or PygameSink()
+        self._queue: List[Tuple[int, int, PlaybackHandle]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.current: Optional[PlaybackHandle] = None
+        self.overlay: Optional[PlaybackHandle] = None
+        self.underruns = 0
+        self.played = 0
+        self.last_speech_at = 0.0  # time.time() when the first audio of an utterance was last queued
+        self.error: Optional[Exception] = None  # why the device could not be opened
+
+    def ensure_started(self) -> None:
+        """
+        Opens the audio device and starts the playback thread once. Raises AudioDeviceError when
+        the device cannot be opened; the next call tries again.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._ready.clear()
+                self.error = None
+                self._thread = threading.Thread(target=self._run, name='audio-player', daemon=True)
+                self._thread.start()
+        if not self._ready.wait(5):
+            raise AudioDeviceError("Audio device did not open within 5 seconds")
+        if self.error is not None:
+            raise AudioDeviceError(f"Could not open audio device: {self.error}")
+
+    def open_stream(self, priority: int = PRIORITY_SPEECH, preempt: bool = False) -> PlaybackHandle:
+        """
+        Queues an utterance whose chunks are added later with handle.add().
+        Real speech supersedes filler cues once its first audio arrives, so queued or playing
+        cues are dropped then; a stream opened before the answer exists leaves them alone.
+        """
+        self.ensure_started()
+        handle = PlaybackHandle(self, priority, preempt)
+        with self._lock:
+            heapq.heappush(self._queue, (priority, next(self._sequence), handle))
+        if not self._thread.is_alive():
+            # Player stopped between starting and queueing: nothing will ever play this
+            handle.cancel()
+            handle.done.set()
+        self._wakeup.set()
+        return handle
+
+    def play(self, data: bytes, priority: int = PRIORITY_SPEECH, preempt: bool = False) -> PlaybackHandle:
+        """Queues a complete audio buffer."""
+        handle = self.open_stream(priority, preempt)
+        handle.add(data)
+        handle.close()
+        return handle
+
+    def _audio_queued(self, handle: PlaybackHandle) -> None:
+        """Called with the first audio of an utterance: speech stamps last_speech_at and drops cues."""
+        if handle.priority >= PRIORITY_CUE:
+            return
+        with self._lock:
+            self.last_speech_at = time.time()
+            for other in [h for _, _, h in self._queue] + [h for h in (self.current, self.overlay) if h]:
+                if other.priority >= PRIORITY_CUE:
+                    other.cancel()
+
+    def queued_until(self, handle: PlaybackHandle) -> Optional[float]:
+        """
+        time.perf_counter() at which the audio queued ahead of a waiting handle should have
+        finished, or None when nothing is ahead of it (it is playing, done or next in line).
+        """
+        now = time.perf_counter()
+        with self._lock:
+            entry = next(((priority, sequence) for priority, sequence, queued in self._queue if queued is handle), None)
+            if entry is None:
+                return None
+            ahead = [h for h in (self.current, self.overlay) if h and h is not handle]
+            ahead += [queued for priority, sequence, queued in self._queue
+                      if (priority, sequence) < entry and not queued.cancelled]
+        if not ahead:
+            return None
+        end = now
+        for other in ahead:
+            if other.started_at is not None:
+                end = max(end, other.started_at + other.duration)
+            else:
+                end += other.duration
+        return end
+
+    def stop_all(self) -> None:
+        """Cancels everything queued or playing."""
+        with self._lock:
+            handles = [handle for _, _, handle in self._queue] + [h for h in (self.current, self.overlay) if h]
+        for handle in handles:
+            handle.cancel()
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        """Reports queue depth, underruns and what is playing."""
+        with self._lock:
+            return {
+                'queue_depth': len(self._queue),
+                'underruns': self.underruns,
+                'played': self.played,
+                'playing': self.current is not None,
+                'overlay': self.overlay is not None,
+            }
+
+    def shutdown(self) -> None:
+        """Stops playback and closes the audio device."""
+        self.stop_all()
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _abandon_all(self) -> None:
+        """Ends every queued and playing utterance once the player thread stops."""
+        with self._lock:
+            handles = [handle for _, _, handle in self._queue] + [h for h in (self.current, self.overlay) if h]
+            self._queue.clear()
+            self.current = self.overlay = None
+        for handle in handles:
+            handle.cancel()
+            handle.done.set()
+
+    def _finish(self, handle: PlaybackHandle, channel: str) -> None:
+        self.sink.stop(channel)
+        handle.done.set()
+        self.played += 1
+
+    def _pop_next(self) -> Optional[PlaybackHandle]:
+        with self._lock:
+            while self._queue:
+                _, _, handle = heapq.heappop(self._queue)
+                if handle.cancelled:
+                    handle.done.set()
+                    continue
+                return handle
+        return None
+
+    def _peek(self) -> Optional[PlaybackHandle]:
+        with self._lock:
+            return self._queue[0][2] if self._queue else None
+
+    def _feed(self, handle: PlaybackHandle, channel: str, underrun_flag: list) -> bool:
+        """Keeps the channel fed with the handle's chunks. Returns True when the handle finished."""
+        if handle.cancelled:
+            self._finish(handle, channel)
+            return True
+
+        if not self.sink.busy(channel):
+            if handle.chunks:
+                self.sink.play(channel, handle.chunks.popleft())
+                if not handle.started.is_set():
+                    handle.started_at = time.perf_counter()
+                    handle.started.set()
+                underrun_flag[0] = False
+            elif handle.closed:
+                self._finish(handle, channel)
+                return True
+            elif handle.started.is_set() and not underrun_flag[0]:
+                # Streaming utterance ran dry before its next chunk arrived
+                self.underruns += 1
+                underrun_flag[0] = True
+        elif handle.chunks and not self.sink.has_queued(channel):
+            # Queue the next chunk now so it starts without a gap
+            self.sink.queue(channel, handle.chunks.popleft())
+        return False
+
+    def _run(self) -> None:
+        try:
+            self.sink.open()
+        except Exception as e:
+            logger.error(f"Could not open audio device: {e}")
+            self.error = e
+            self._ready.set()
+            self._abandon_all()
+            return
+        self._ready.set()
+
+        try:
+            self._play_loop()
+        finally:
+            self._abandon_all()
+            self.sink.close()
+
+    def _play_loop(self) -> None:
+        main_underrun, overlay_underrun = [False], [False]
+        while not self._stop.is_set():
+            upcoming = self._peek()
+
+            # A more urgent utterance preempts or ducks the current one
+            if self.current and upcoming and upcoming.priority < self.current.priority and self.overlay is None:
+                handle = self._pop_next()
+                if handle and handle.preempt:
+                    self.current.cancel()
+                    self._finish(self.current, 'main')
+                    self.current, main_underrun = handle, [False]
+                elif handle:
+                    self.sink.set_volume('main', DUCK_VOLUME)
+                    self.overlay, overlay_underrun = handle, [False]
+
+            if self.current is None:
+                self.current, main_underrun = self._pop_next(), [False]
+
+            if self.current and self._feed(self.current, 'main', main_underrun):
+                self.current = None
+                continue
+
+            if self.overlay and self._feed(self.overlay, 'overlay', overlay_underrun):
+                self.overlay = None
+                self.sink.set_volume('main', 1.0)
+
+            self._wakeup.wait(0.01)
+            self._wakeup.clear()
+
+
+# Global instance
+audio_player = AudioPlayer()
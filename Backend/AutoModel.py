@@ -1,5 +1,8 @@
 import cohere
 from Backend.Extra import TimeIt
+from Backend.ConnectionPool import get_http_client
+from Backend.Cancellation import QueryCancelled
+from Backend.Replay import transport
 from rich import print
 from json import load, dump
 from dotenv import load_dotenv
@@ -9,7 +12,7 @@ from os import environ
 load_dotenv()
 
 # Initialize Cohere client with API key
-co = cohere.Client(api_key=environ['CohereAPI'])
+co = cohere.Client(api_key=environ['CohereAPI'], httpx_client=get_http_client())
 
 # List of known functions that the model will decide upon
 funcs = [
@@ -21,10 +24,11 @@ funcs = [
 ]
 
 @TimeIt
-def Model(prompt: str = 'test'):
+def Model(prompt: str = 'test', cancel_token=None):
     """
     The main function that processes a prompt, appends it to the chat log,
     and sends it to the Cohere API for decision-making on query types.
+    Raises QueryCancelled if cancel_token is cancelled while the stream is read.
     """
     
     # Load chat history from ChatLog.json
@@ -39,7 +43,7 @@ def Model(prompt: str = 'test'):
         dump(messages, f, indent=4)
     
     # Cohere streaming response to classify the prompt
-    stream = co.chat_stream(
+    open_stream = lambda: co.chat_stream(
         model='command-r-plus-08-2024', 
         message=prompt, 
         temperature=0.3, 
@@ -105,12 +109,24 @@ def Model(prompt: str = 'test'):
         )
     )
 
+    def live_tokens():
+        stream = open_stream()
+        try:
+            for event in stream:
+                if event.event_type == 'text-generation':
+                    yield event.text
+        finally:
+            stream.close()
+
     response = ''
-    # Collect the response text from the Cohere API stream
-    for event in stream:
-        if event.event_type == 'text-generation':
-            response += event.text
-            print(event.text, end='')
+    # Collect the response text from the Cohere API stream (or its recording)
+    tokens = transport.stream('cohere_chat', {'model': 'command-r-plus-08-2024', 'message': prompt}, live_tokens)
+    for text in tokens:
+        if cancel_token and cancel_token.cancelled:
+            tokens.close()
+            raise QueryCancelled()
+        response += text
+        print(text, end='')
 
     print()  # Print a newline after streaming
     
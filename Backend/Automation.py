@@ -1,4 +1,3 @@
-import requests
 import random
 import asyncio
 import platform
@@ -17,6 +16,8 @@ from pyautogui import hotkey
 # Import backend modules
 from .RSE import GoogleSearch
 from .AIClientManager import get_ai_response
+from .ConnectionPool import get_session
+from .Replay import replayable
 
 load_dotenv()
 
@@ -103,10 +104,11 @@ def content_writer_ai(prompt):
     return answer.replace('</s>', '')
 
 # Function for generating images using Hugging Face API
+@replayable('huggingface')
 async def query_image_generation(payload):
     api_url = 'https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-2-1'
     headers = {'Authorization': f"Bearer {HUGGINGFACE_API_KEY}"}
-    response = await asyncio.to_thread(requests.post, api_url, headers=headers, json=payload)
+    response = await asyncio.to_thread(get_session().post, api_url, headers=headers, json=payload)
     return response.content
 
 async def generate_images(prompt):
@@ -288,62 +290,66 @@ def play_youtube(query):
     playonyt(query)
     return True
 
-# Asynchronous task executor
-async def execute_commands(commands):
-    results = []
-    for command in commands:
-        if command.startswith('open '):
-            app_name = command.removeprefix('open ')
-            print(f"Trying to open: {app_name}")
+# Executes one command; blocking, so it runs off the event loop
+def execute_command(command):
+    if command.startswith('open '):
+        app_name = command.removeprefix('open ')
+        print(f"Trying to open: {app_name}")
 
-            # Check if it's a known web service first
-            if app_name.lower() in web_services:
-                print(f"Opening web service: {app_name}")
-                webopen(web_services[app_name.lower()])
-                opened_websites.append(app_name.lower())
-                results.append(f"Opened {app_name} website")
-            else:
-                # Try opening as desktop app
-                print(f"Trying to open app: {app_name}")
-                if open_app(app_name):
-                    results.append(f"Opened {app_name}")
-                else:
-                    print(f"App '{app_name}' not found, trying as website: https://{app_name}.com")
-                    # If not an app, try opening as website
-                    webopen(f'https://{app_name}.com')
-                    opened_websites.append(app_name.lower())
-                    results.append(f"Opened {app_name} website")
-        elif command.startswith('close '):
-            app_name = command.removeprefix('close ')
-            print(f"Trying to close app: {app_name}")
-            if app_name.lower() in opened_websites:
-                opened_websites.remove(app_name.lower())
-                results.append(f"Closed {app_name} website (please close the browser tab manually)")
-            elif close_app(app_name):
-                results.append(f"Closed {app_name}")
-            else:
-                results.append(f"Could not close {app_name}")
-        elif command.startswith('play '):
-            query = command.removeprefix('play ')
-            play_youtube(query)
-            results.append(f"Playing {query} on YouTube")
-        elif command.startswith('system '):
-            cmd = command.removeprefix('system ').strip('() ').strip()
-            if system_command(cmd):
-                results.append(f"Executed system command: {cmd}")
+        # Check if it's a known web service first
+        if app_name.lower() in web_services:
+            print(f"Opening web service: {app_name}")
+            webopen(web_services[app_name.lower()])
+            opened_websites.append(app_name.lower())
+            return f"Opened {app_name} website"
+        else:
+            # Try opening as desktop app
+            print(f"Trying to open app: {app_name}")
+            if open_app(app_name):
+                return f"Opened {app_name}"
             else:
-                results.append(f"Failed to execute: {cmd}")
-        elif command.startswith('google search '):
-            query = command.removeprefix('google search ')
-            print(f"Performing Google search for: {query}")
-            search_results = GoogleSearch(query)
-            print(f"Search completed, results length: {len(search_results)}")
-            results.append(f"Searched for: {query}")
-            # The search results will be handled by the main execution flow
+                print(f"App '{app_name}' not found, trying as website: https://{app_name}.com")
+                # If not an app, try opening as website
+                webopen(f'https://{app_name}.com')
+                opened_websites.append(app_name.lower())
+                return f"Opened {app_name} website"
+    elif command.startswith('close '):
+        app_name = command.removeprefix('close ')
+        print(f"Trying to close app: {app_name}")
+        if app_name.lower() in opened_websites:
+            opened_websites.remove(app_name.lower())
+            return f"Closed {app_name} website (please close the browser tab manually)"
+        elif close_app(app_name):
+            return f"Closed {app_name}"
+        else:
+            return f"Could not close {app_name}"
+    elif command.startswith('play '):
+        query = command.removeprefix('play ')
+        play_youtube(query)
+        return f"Playing {query} on YouTube"
+    elif command.startswith('system '):
+        cmd = command.removeprefix('system ').strip('() ').strip()
+        if system_command(cmd):
+            return f"Executed system command: {cmd}"
         else:
-            print(f'No function found for {command}')
-            results.append(f"Unknown command: {command}")
+            return f"Failed to execute: {cmd}"
+    elif command.startswith('google search '):
+        query = command.removeprefix('google search ')
+        print(f"Performing Google search for: {query}")
+        search_results = GoogleSearch(query)
+        print(f"Search completed, results length: {len(search_results)}")
+        # The search results will be handled by the main execution flow
+        return f"Searched for: {query}"
+    else:
+        print(f'No function found for {command}')
+        return f"Unknown command: {command}"
 
+# Asynchronous task executor
+async def execute_commands(commands):
+    results = []
+    for command in commands:
+        # Worker thread keeps the shared event loop free for speech synthesis and network I/O
+        results.append(await asyncio.to_thread(execute_command, command))
     return results
 
 # Function to run automation commands
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Query Cancellation
+A token per query that tears down classification, LLM streams, search, synthesis and playback
+"""
+
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCancelled(Exception):
+    """Raised inside a query pipeline once its token has been cancelled."""
+
+
+class CancellationToken:
+    """
+    Cancelled when a new utterance or a stop command supersedes the query.
+    Calling the token returns True while the query is still live, so it can be passed
+    directly as the `func` callback of the TTS functions.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def __call__(self, r=None) -> bool:
+        return not self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancels the query and runs the registered teardown callbacks once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Cancellation callback failed: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Registers a teardown callback (e.g. closing an API stream) and returns a function
+        that unregisters it. Runs the callback immediately if already cancelled.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+
+                def unregister():
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+                return unregister
+        callback()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        """Raises QueryCancelled if the query has been cancelled."""
+        if self._event.is_set():
+            raise QueryCancelled()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Blocks until cancelled or the timeout passes; returns True if cancelled."""
+        return self._event.wait(timeout)
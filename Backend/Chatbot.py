@@ -7,7 +7,9 @@ from dotenv import load_dotenv
 from os import environ
 
 # Import the AI Client Manager
-from .AIClientManager import get_ai_response
+from .AIClientManager import get_ai_response, UNAVAILABLE_MESSAGE
+from .SemanticCache import semantic_cache
+from .Cancellation import QueryCancelled
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -80,15 +82,22 @@ def AnswerModifier(answer):
     non_empty_lines = [line.strip() for line in lines if line.strip()]
     return '\n'.join(non_empty_lines)
 
-def ChatBotAI(prompt):
+def ChatBotAI(prompt, on_token=None, cancel_token=None):
     """
     Handles the chatbot's logic using AI Client Manager with automatic fallback.
+    Streamed tokens are passed to on_token as they arrive.
     """
     try:
         # Load existing chat log
         with open('ChatLog.json', 'r') as f:
             messages = load(f)
 
+        # Serve near-duplicate questions from the semantic cache
+        history = messages[-6:]
+        cached_answer = semantic_cache.get(prompt, history)
+        if cached_answer:
+            return cached_answer
+
         # Prepare messages for AI client manager
         system_info = {'role': 'system', 'content': Information()}
         all_messages = SystemChatBot + [system_info] + messages
@@ -99,12 +108,19 @@ def ChatBotAI(prompt):
             model='llama-3.3-70b-versatile',
             temperature=0.3,
             max_tokens=2048,
-            stream=True
+            stream=True,
+            on_token=on_token,
+            cancel_token=cancel_token
         )
 
-        # Return the modified answer
-        return AnswerModifier(answer)
+        # Cache and return the modified answer
+        answer = AnswerModifier(answer)
+        if answer != UNAVAILABLE_MESSAGE:
+            semantic_cache.put(prompt, answer, history)
+        return answer
 
+    except QueryCancelled:
+        raise
     except Exception as e:
         # Log the error and provide fallback response
         logger.error(f"All AI services failed in ChatBotAI: {e}")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Request Coalescing Check
+Verifies offline that two near-simultaneous chatbot requests for the same question share one
+API call, using a private AIClientManager pointed at a slow local LLM stub
+"""
+
+import sys
+import time
+import datetime
+import argparse
+import threading
+from typing import Dict, List
+
+from .AIClientManager import AIClientManager
+from .LocalLLMStub import start_stub_server
+
+SYSTEM_PROMPT = "You are a very accurate and advanced AI chatbot."
+HISTORY = [
+    {'role': 'user', 'content': 'Hello, how are you?'},
+    {'role': 'assistant', 'content': 'I am doing well. How may I assist you?'},
+]
+
+
+def chatbot_messages(question: str, repeats: int = 1) -> List[Dict]:
+    """
+    The message list ChatBotAI sends: system prompt, a time block that changes every second,
+    and the chat log ending with the question (logged `repeats` times, as main.py does when the
+    same question arrives again while the first is answered).
+    """
+    now = datetime.datetime.now()
+    information = (
+        f"Use this real-time information if needed:\n"
+        f"Day: {now.strftime('%A')}\n"
+        f"Date: {now.strftime('%d')}\n"
+        f"Month: {now.strftime('%B')}\n"
+        f"Year: {now.strftime('%Y')}\n"
+        f"Time: {now.strftime('%H')} hours :{now.strftime('%M')} minutes :{now.strftime('%S')} seconds.\n"
+    )
+    return ([{'role': 'system', 'content': SYSTEM_PROMPT}, {'role': 'system', 'content': information}]
+            + HISTORY + [{'role': 'user', 'content': question}] * repeats)
+
+
+def check_coalescing(delay: float = 1.1, token_delay: float = 0.2) -> Dict[str, int]:
+    """
+    Sends the same question twice, the second time `delay` seconds later while the first is
+    still streaming, and returns the manager's request counters.
+    """
+    server, url = start_stub_server(token_delay=token_delay)
+    manager = AIClientManager()
+    manager.groq_clients, manager.gemini_client, manager.cohere_client = [], None, None
+    manager.local_url = url
+
+    question = 'Explain how coalescing of identical requests works'
+    first = threading.Thread(target=manager.get_completion_with_fallback, args=(chatbot_messages(question),))
+    try:
+        first.start()
+        time.sleep(delay)
+        manager.get_completion_with_fallback(chatbot_messages(question, repeats=2))
+        first.join()
+    finally:
+        server.shutdown()
+    return manager.get_metrics()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check that identical near-simultaneous chatbot requests share one API call')
+    parser.add_argument('--delay', type=float, default=1.1, help='seconds between the two requests')
+    args = parser.parse_args()
+
+    metrics = check_coalescing(args.delay)
+    coalesced = metrics['api_calls'] == 1 and metrics['coalesced'] == 1
+    print(f"{'coalesced' if coalesced else 'NOT coalesced'}: {metrics}")
+    sys.exit(0 if coalesced else 1)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Shared Connection Pool
+Pooled keep-alive HTTP sessions for every provider, with background warm-up and keep-alive pings
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Hosts contacted by the assistant, warmed at startup
+PROVIDER_URLS = {
+    'groq': 'https://api.groq.com',
+    'gemini': 'https://generativelanguage.googleapis.com',
+    'cohere': 'https://api.cohere.com',
+    'ddgs': 'https://duckduckgo.com',
+    'wikipedia': 'https://en.wikipedia.org',
+    'openweather': 'http://api.openweathermap.org',
+    'huggingface': 'https://api-inference.huggingface.co',
+}
+
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '20'))
+KEEPALIVE_INTERVAL = float(os.getenv('HTTP_KEEPALIVE_INTERVAL', '60'))  # seconds, 0 disables pings
+KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '300'))
+
+_session: Optional[requests.Session] = None
+_http_client: Optional[httpx.Client] = None
+_lock = threading.Lock()
+_stop_event = threading.Event()
+_keepalive_thread: Optional[threading.Thread] = None
+
+# provider -> seconds taken by the last warm-up or ping
+warmup_times: Dict[str, float] = {}
+
+
+def get_session() -> requests.Session:
+    """Returns the shared requests session with a keep-alive connection pool."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(PROVIDER_URLS), pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def get_http_client() -> httpx.Client:
+    """Returns the shared httpx client used by the Groq and Cohere SDKs (HTTP/2 when available)."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=POOL_SIZE,
+                    max_keepalive_connections=POOL_SIZE,
+                    keepalive_expiry=KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                follow_redirects=True
+            )
+            logger.info(f"Initialized shared HTTP client (HTTP/2: {HTTP2_AVAILABLE})")
+        return _http_client
+
+
+def _touch(name: str, url: str) -> None:
+    """Resolves the host and opens (or reuses) a pooled connection to it."""
+    start = time.time()
+    try:
+        host = urlparse(url).hostname
+        socket.getaddrinfo(host, 443 if url.startswith('https') else 80)
+        # Both pools are warmed: the SDKs use httpx, the helpers use requests
+        get_http_client().head(url, timeout=5.0)
+        get_session().head(url, timeout=5.0)
+        warmup_times[name] = time.time() - start
+    except Exception as e:
+        logger.debug(f"Warm-up of {name} failed: {e}")
+
+
+def warm_up(providers: Optional[Dict[str, str]] = None) -> None:
+    """Opens connections to every provider in parallel so the first query pays no setup cost."""
+    providers = providers or PROVIDER_URLS
+    threads = [threading.Thread(target=_touch, args=(name, url), daemon=True) for name, url in providers.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    logger.info(f"Connection warm-up finished: { {k: round(v, 3) for k, v in warmup_times.items()} }")
+
+
+def _keepalive_loop(providers: Dict[str, str]) -> None:
+    """Pings idle connections so the servers do not close them."""
+    while not _stop_event.wait(KEEPALIVE_INTERVAL):
+        for name, url in providers.items():
+            _touch(name, url)
+
+
+def start_connection_warmup(providers: Optional[Dict[str, str]] = None) -> None:
+    """Warms every provider in the background and starts the keep-alive pinger."""
+    global _keepalive_thread
+    providers = providers or PROVIDER_URLS
+
+    def run():
+        warm_up(providers)
+        if KEEPALIVE_INTERVAL > 0:
+            _keepalive_loop(providers)
+
+    if _keepalive_thread is None or not _keepalive_thread.is_alive():
+        _stop_event.clear()
+        _keepalive_thread = threading.Thread(target=run, name='connection-warmup', daemon=True)
+        _keepalive_thread.start()
+
+
+def stop_connection_warmup() -> None:
+    """Stops the keep-alive pinger."""
+    _stop_event.set()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    warm_up()
+    for name, url in PROVIDER_URLS.items():
+        start = time.time()
+        try:
+            get_http_client().head(url, timeout=5.0)
+            print(f"{name}: warm request took {time.time() - start:.3f}s")
+        except Exception as e:
+            print(f"{name}: {e}")
@@ -11,11 +11,21 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 import eel
-from Backend.TTS import TTS
+from Backend.TTS import TTS, RegisterFrequentPhrases
+from Backend.Replay import replayable
 
 # Load environment variables
 load_dotenv()
 
+# Fixed prompts spoken during email composition, pre-synthesized at startup
+RegisterFrequentPhrases([
+    "Email credentials not found in environment variables.",
+    "Please enter the receiver's email in the text box on the web interface",
+    "Timeout waiting for receiver email.",
+    "Please say the subject",
+    "Please say the body",
+])
+
 # Global variables for email composition
 email_composition_state = {
     'active': False,
@@ -28,6 +38,15 @@ email_composition_state = {
 # Voice input buffer for email composition
 voice_input_buffer = None
 
+@replayable('smtp', lambda sender, password, receiver, text: {'from': sender, 'to': receiver, 'message': text})
+def deliver(sender: str, password: str, receiver: str, text: str) -> None:
+    """Sends a composed message through Gmail SMTP."""
+    server = smtplib.SMTP('smtp.gmail.com', 587)
+    server.starttls()
+    server.login(sender, password)
+    server.sendmail(sender, receiver, text)
+    server.quit()
+
 def print_slow_and_speak(text: str) -> None:
     """Provides audio feedback using existing TTS system."""
     print(text)
@@ -149,12 +168,7 @@ def send_email() -> str:
         msg.attach(MIMEText(body, 'plain'))
 
         # Send email
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(EMAIL, PASSWORD)
-        text = msg.as_string()
-        server.sendmail(EMAIL, receiver_email, text)
-        server.quit()
+        deliver(EMAIL, PASSWORD, receiver_email, msg.as_string())
 
         success_msg = f"Email sent successfully to {receiver_email}"
         print_slow_and_speak(success_msg)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Latency-Based Provider Router
+Keeps rolling time-to-first-token and tokens-per-second statistics per provider and model
+and picks the one most likely to meet the caller's latency target
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from statistics import median
+from typing import Deque, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+Candidate = Tuple[str, str]  # (provider, model)
+
+
+class ProviderStats:
+    """Rolling window of latency samples for one provider/model pair."""
+
+    def __init__(self, window: int):
+        self.ttft: Deque[float] = deque(maxlen=window)
+        self.tps: Deque[float] = deque(maxlen=window)
+        self.failures = 0
+        self.last_updated = 0.0
+
+    def add(self, ttft: float, tps: Optional[float]):
+        self.ttft.append(ttft)
+        if tps:
+            self.tps.append(tps)
+        self.last_updated = time.time()
+
+    def success_probability(self, target: float) -> float:
+        """Fraction of recent requests whose first token arrived within the target."""
+        if not self.ttft:
+            return 0.0
+        return sum(1 for value in self.ttft if value <= target) / len(self.ttft)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'samples': len(self.ttft),
+            'median_ttft': median(self.ttft) if self.ttft else None,
+            'median_tps': median(self.tps) if self.tps else None,
+            'failures': self.failures,
+            'age': time.time() - self.last_updated if self.last_updated else None,
+        }
+
+
+class LatencyRouter:
+    """
+    Orders candidate providers by their likelihood of meeting a time-to-first-token target.
+    The chosen provider goes first and the rest keep their static priority as fallbacks.
+    """
+
+    def __init__(self, window: int = None, exploration_rate: float = None,
+                 stale_after: float = None, default_target: float = None):
+        self.window = window or int(os.getenv('ROUTER_WINDOW', '20'))
+        self.exploration_rate = exploration_rate if exploration_rate is not None else float(os.getenv('ROUTER_EXPLORATION_RATE', '0.05'))
+        self.stale_after = stale_after if stale_after is not None else float(os.getenv('ROUTER_STALE_AFTER', '600'))
+        self.default_target = default_target if default_target is not None else float(os.getenv('ROUTER_TTFT_TARGET', '1.5'))
+        self.failure_penalty = 30.0  # seconds recorded as TTFT when a provider fails
+
+        self._stats: Dict[Candidate, ProviderStats] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, candidate: Candidate) -> ProviderStats:
+        if candidate not in self._stats:
+            self._stats[candidate] = ProviderStats(self.window)
+        return self._stats[candidate]
+
+    def record(self, provider: str, model: str, ttft: float, tokens: int, total_time: float):
+        """Records a successful request."""
+        generation_time = total_time - ttft
+        tps = tokens / generation_time if tokens > 1 and generation_time > 0 else None
+        with self._lock:
+            self._get((provider, model)).add(ttft, tps)
+
+    def record_failure(self, provider: str, model: str):
+        """Records a failed request as a very slow sample."""
+        with self._lock:
+            stats = self._get((provider, model))
+            stats.failures += 1
+            stats.add(self.failure_penalty, None)
+
+    def rank(self, candidates: List[Candidate], latency_target: Optional[float] = None) -> Tuple[List[Candidate], str]:
+        """
+        Returns the candidates in the order they should be tried, and the reason for the first choice.
+        """
+        target = latency_target or self.default_target
+        now = time.time()
+
+        with self._lock:
+            stats = {candidate: self._get(candidate) for candidate in candidates}
+
+            # Refresh providers with no or stale statistics now and then
+            stale = [c for c in candidates if not stats[c].ttft or now - stats[c].last_updated > self.stale_after]
+            measured = [c for c in candidates if stats[c].ttft]
+
+            if not measured:
+                return list(candidates), 'static order (no latency data yet)'
+
+            if stale and random.random() < self.exploration_rate:
+                choice = random.choice(stale)
+                reason = 'exploring provider with stale or missing statistics'
+            else:
+                def score(candidate: Candidate):
+                    summary = stats[candidate]
+                    return (-summary.success_probability(target), median(summary.ttft))
+
+                choice = min(measured, key=score)
+                probability = stats[choice].success_probability(target)
+                reason = (f"P(ttft<={target:.2f}s)={probability:.2f}, "
+                          f"median ttft {median(stats[choice].ttft):.2f}s over {len(stats[choice].ttft)} samples")
+
+        order = [choice] + [c for c in candidates if c != choice]
+        return order, reason
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Returns the current statistics per provider/model."""
+        with self._lock:
+            return {f'{provider}/{model}': stats.summary() for (provider, model), stats in self._stats.items()}
+
+
+if __name__ == "__main__":
+    router = LatencyRouter(exploration_rate=0.0)
+    candidates = [('groq', 'llama-3.3-70b-versatile'), ('gemini', 'gemini-1.5-flash'), ('cohere', 'command-r-plus')]
+    print(router.rank(candidates))
+    for _ in range(5):
+        router.record('groq', 'llama-3.3-70b-versatile', 2.5, 200, 4.0)
+        router.record('gemini', 'gemini-1.5-flash', 0.8, 200, 2.0)
+    print(router.rank(candidates, latency_target=1.0))
+    print(router.snapshot())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Local LLM Stand-In Server
+A deterministic OpenAI-compatible chat endpoint for exercising the local provider offline
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+def stub_answer(messages: list) -> str:
+    """Builds the deterministic reply for a conversation."""
+    last_user = next((msg.get('content', '') for msg in reversed(messages) if msg.get('role') == 'user'), '')
+    if isinstance(last_user, list):
+        last_user = ' '.join(part.get('text', '') for part in last_user if isinstance(part, dict))
+    return f"This is the offline assistant. You asked: {last_user}".strip()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves /health, /v1/models and /v1/chat/completions (streaming and non-streaming)."""
+
+    token_delay = 0.0  # seconds between streamed tokens
+    model = 'local-stub'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path in ('/health', '/v1/health'):
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/v1/models':
+            self._send_json(200, {'object': 'list', 'data': [{'id': self.model, 'object': 'model'}]})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/v1/chat/completions':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        answer = stub_answer(request.get('messages', []))
+
+        if not request.get('stream'):
+            self._send_json(200, {
+                'object': 'chat.completion',
+                'model': self.model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': answer}, 'finish_reason': 'stop'}]
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        words = answer.split(' ')
+        for i, word in enumerate(words):
+            token = word if i == 0 else ' ' + word
+            chunk = {'object': 'chat.completion.chunk', 'model': self.model,
+                     'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            if self.token_delay:
+                time.sleep(self.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_stub_server(port: int = 0, token_delay: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Starts the stub on a background thread and returns the server and its base URL."""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'token_delay': token_delay})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Deterministic OpenAI-compatible stand-in server')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--token-delay', type=float, default=0.02)
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.token_delay)
+    print(f"Local LLM stub listening on {url} (set LOCAL_LLM_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Page Fetcher
+Fetches the top search result pages concurrently on the shared event loop and extracts their main text
+"""
+
+import os
+import time
+import asyncio
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import httpx
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+
+from .EventLoop import run_coroutine
+from .SearchFanout import normalize_url
+from .Replay import replayable
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# lxml parses several times faster than the built-in parser when it is installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+PAGE_FETCH_ENABLED = os.getenv('PAGE_FETCH_ENABLED', 'false').lower() == 'true'
+PAGE_FETCH_TOP_K = int(os.getenv('PAGE_FETCH_TOP_K', '3'))
+PAGE_FETCH_MAX_BYTES = int(os.getenv('PAGE_FETCH_MAX_BYTES', str(512 * 1024)))  # per page
+PAGE_FETCH_TIMEOUT = float(os.getenv('PAGE_FETCH_TIMEOUT', '1.5'))  # seconds per page
+PAGE_TEXT_CHARS = int(os.getenv('PAGE_TEXT_CHARS', '2000'))  # extracted text kept per page
+PAGE_CACHE_TTL = float(os.getenv('PAGE_CACHE_TTL', '3600'))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', '256'))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.75 Safari/537.36'
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'svg', 'iframe']
+MIN_PARAGRAPH_CHARS = 40
+
+
+def extract_main_text(html: bytes, max_chars: int = None) -> str:
+    """
+    Readable text of a page: paragraphs and list items of its <article> or <main> element
+    (the whole body otherwise), without navigation, scripts and other boilerplate.
+    """
+    max_chars = max_chars or PAGE_TEXT_CHARS
+    soup = BeautifulSoup(html, HTML_PARSER)
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+
+    root = soup.find('article') or soup.find('main') or soup.body or soup
+    paragraphs, length = [], 0
+    for element in root.find_all(['p', 'li', 'td']):
+        text = ' '.join(element.get_text(' ', strip=True).split())
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        paragraphs.append(text)
+        length += len(text) + 1
+        if length >= max_chars:
+            break
+    if not paragraphs:
+        # Pages without paragraph markup: fall back to all visible text
+        paragraphs = [' '.join(root.get_text(' ', strip=True).split())]
+    return ' '.join(paragraphs)[:max_chars]
+
+
+class PageFetcher:
+    """
+    Downloads result pages through one pooled httpx.AsyncClient living on the shared event loop.
+    Each page gets a byte and a time budget; extracted text is cached by normalized URL.
+    """
+
+    def __init__(self, max_bytes: int = None, timeout: float = None, cache_ttl: float = None):
+        self.max_bytes = max_bytes or PAGE_FETCH_MAX_BYTES
+        self.timeout = timeout or PAGE_FETCH_TIMEOUT
+        self.cache_ttl = cache_ttl if cache_ttl is not None else PAGE_CACHE_TTL
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cache: 'OrderedDict[str, tuple]' = OrderedDict()  # url -> (text, fetched_at)
+        self._lock = threading.Lock()
+
+        self.fetched = 0
+        self.cache_hits = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.truncated = 0
+        self.bytes_read = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """The async client of the running loop, created on first use (clients cannot cross loops)."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+                timeout=httpx.Timeout(self.timeout),
+                headers={'User-Agent': USER_AGENT},
+                follow_redirects=True
+            )
+            self._client_loop = loop
+        return self._client
+
+    def cached(self, url: str) -> Optional[str]:
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.cache_ttl:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return entry[0]
+
+    def _store(self, url: str, text: str) -> None:
+        with self._lock:
+            self._cache[normalize_url(url)] = (text, time.time())
+            self._cache.move_to_end(normalize_url(url))
+            while len(self._cache) > PAGE_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+    @replayable('page', lambda self, url: {'url': url})
+    async def _download(self, url: str) -> bytes:
+        """Streams the page body, stopping at the byte budget."""
+        chunks, size = [], 0
+        async with self._get_client().stream('GET', url) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('content-type', '')
+            if content_type and 'html' not in content_type and 'text/plain' not in content_type:
+                return b''
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    self.truncated += 1
+                    break
+        self.bytes_read += size
+        return b''.join(chunks)[:self.max_bytes]
+
+    async def fetch_text(self, url: str) -> str:
+        """Main text of one page, from the cache or downloaded within the budgets; '' on failure."""
+        text = self.cached(url)
+        if text is not None:
+            return text
+        try:
+            html = await asyncio.wait_for(self._download(url), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.info(f"Page fetch of {url} exceeded {self.timeout}s")
+            return ''
+        except Exception as e:
+            self.errors += 1
+            logger.info(f"Page fetch of {url} failed: {e}")
+            return ''
+
+        # Parsing is CPU work; keep it off the loop so other coroutines (speech) keep running
+        text = await asyncio.to_thread(extract_main_text, html) if html else ''
+        self.fetched += 1
+        if text:
+            self._store(url, text)
+        return text
+
+    async def fetch_all(self, urls: List[str]) -> List[str]:
+        """Main text of every page, fetched concurrently."""
+        return await asyncio.gather(*(self.fetch_text(url) for url in urls))
+
+    def enrich(self, results: List[Dict], top_k: int = None) -> List[Dict]:
+        """
+        Copies of the results with the snippet of the top_k web results replaced by the text
+        of their page. Results whose page could not be read keep their snippet.
+        """
+        top_k = top_k or PAGE_FETCH_TOP_K
+        targets = [i for i, result in enumerate(results)
+                   if result.get('href', '').startswith(('http://', 'https://'))][:top_k]
+        if not targets:
+            return results
+
+        try:
+            texts = run_coroutine(self.fetch_all([results[i]['href'] for i in targets]), timeout=self.timeout + 1)
+        except Exception as e:
+            logger.warning(f"Page fetching failed: {e}")
+            return results
+
+        enriched = [dict(result) for result in results]
+        for i, text in zip(targets, texts):
+            if text:
+                enriched[i]['snippet'] = enriched[i].get('body', '')
+                enriched[i]['body'] = text
+        return enriched
+
+    def stats(self) -> Dict[str, int]:
+        """Fetch, cache, budget and failure counters."""
+        with self._lock:
+            entries = len(self._cache)
+        return {
+            'fetched': self.fetched,
+            'cache_hits': self.cache_hits,
+            'cache_entries': entries,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'truncated': self.truncated,
+            'bytes_read': self.bytes_read,
+        }
+
+
+# Global instance
+page_fetcher = PageFetcher()
+
+
+if __name__ == '__main__':
+    import tempfile
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+    from .ConnectionPool import get_session
+
+    parser = argparse.ArgumentParser(description='Serial vs concurrent page fetching against a local static-file server')
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.3, help='simulated server latency per page, seconds')
+    parser.add_argument('--paragraphs', type=int, default=200, help='paragraphs per generated page')
+    args = parser.parse_args()
+
+    class SlowHandler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(args.latency)
+            super().do_GET()
+
+        def log_message(self, *log_args):
+            pass
+
+    root = tempfile.mkdtemp()
+    for page in range(args.pages):
+        body = ''.join(f"<p>Paragraph {i} of page {page} explains the topic in enough words to count as text.</p>"
+                       for i in range(args.paragraphs))
+        with open(os.path.join(root, f'page{page}.html'), 'w') as f:
+            f.write(f"<html><head><script>var x = 1;</script></head><body><nav>Home | About</nav>"
+                    f"<article><h1>Page {page}</h1>{body}</article><footer>Footer</footer></body></html>")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(SlowHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f'http://127.0.0.1:{server.server_address[1]}/page{page}.html' for page in range(args.pages)]
+
+    start = time.perf_counter()
+    serial = [extract_main_text(get_session().get(url, timeout=10).content) for url in urls]
+    serial_time = time.perf_counter() - start
+
+    fetcher = PageFetcher(timeout=args.latency + 5)
+    start = time.perf_counter()
+    concurrent = run_coroutine(fetcher.fetch_all(urls))
+    concurrent_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_coroutine(fetcher.fetch_all(urls))
+    cached_time = time.perf_counter() - start
+
+    server.shutdown()
+    print(f"{args.pages} pages, {args.latency * 1000:.0f} ms latency, parser {HTML_PARSER}")
+    print(f"serial:     {serial_time * 1000:7.1f} ms")
+    print(f"concurrent: {concurrent_time * 1000:7.1f} ms ({serial_time / concurrent_time:.1f}x)")
+    print(f"cached:     {cached_time * 1000:7.1f} ms")
+    print(f"same text: {serial == concurrent}, {sum(len(text) for text in concurrent)} chars extracted, {fetcher.stats()}")
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Predictive Prefetch
+Learns when routine live lookups (gold, USD to INR, weather, inbox) are asked for and
+fetches them in the background shortly before, under a daily quota
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true').lower() != 'false'
+PREFETCH_HISTORY_FILE = os.getenv('PREFETCH_HISTORY_FILE', 'PrefetchHistory.json')
+PREFETCH_HISTORY_DAYS = float(os.getenv('PREFETCH_HISTORY_DAYS', '14'))
+PREFETCH_MIN_OCCURRENCES = int(os.getenv('PREFETCH_MIN_OCCURRENCES', '3'))  # distinct days in a time slot
+PREFETCH_SLOT_MINUTES = int(os.getenv('PREFETCH_SLOT_MINUTES', '30'))
+PREFETCH_LEAD_MINUTES = float(os.getenv('PREFETCH_LEAD_MINUTES', '5'))
+PREFETCH_DAILY_QUOTA = int(os.getenv('PREFETCH_DAILY_QUOTA', '24'))
+PREFETCH_CHECK_INTERVAL = float(os.getenv('PREFETCH_CHECK_INTERVAL', '30'))  # seconds
+
+# Routine lookups and the words that identify them in a query (search kinds match RSE.build_search_query)
+LOOKUP_KEYWORDS = {
+    'gold': ['gold price', 'gold rate'],
+    'currency': ['usd to inr', 'dollar to rupee', 'usd inr'],
+    'bitcoin': ['bitcoin', 'btc'],
+    'weather': ['weather', 'temperature outside', 'forecast'],
+    'email': ['read emails', 'read my emails', 'check my email', 'check email', 'inbox', 'new emails'],
+}
+
+
+def classify_lookup(query: str) -> Optional[str]:
+    """The routine lookup a query asks for, or None."""
+    query_lower = query.lower()
+    for kind, keywords in LOOKUP_KEYWORDS.items():
+        if any(keyword in query_lower for keyword in keywords):
+            return kind
+    return None
+
+
+def minute_of_day(timestamp: float) -> int:
+    local = time.localtime(timestamp)
+    return local.tm_hour * 60 + local.tm_min
+
+
+class Prefetcher:
+    """
+    Keeps a timestamped history of routine lookups. A time-of-day slot in which a lookup was
+    asked on at least PREFETCH_MIN_OCCURRENCES different days becomes a prediction; the
+    lookup is fetched shortly before the typical minute and held until its TTL runs out.
+    A prefetched value that is consumed counts as a hit, one that expires unused as waste.
+    """
+
+    def __init__(self, history_file: str = None):
+        self.history_file = history_file or PREFETCH_HISTORY_FILE
+        self.fetchers: Dict[str, Tuple[Callable[[], Any], float]] = {}  # kind -> (fetch, ttl)
+        self.history: List[Dict] = self._load_history()
+
+        self._values: Dict[str, Dict] = {}  # kind -> {'value', 'fetched_at', 'used'}
+        self._done: Dict[Tuple[str, int], str] = {}  # (kind, predicted minute) -> date prefetched
+        self._quota_day = time.strftime('%Y-%m-%d')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.prefetches = 0
+        self.hits = 0
+        self.wasted = 0
+        self.quota_used = 0
+
+    def _load_history(self) -> List[Dict]:
+        try:
+            with open(self.history_file, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _save_history(self) -> None:
+        try:
+            with open(self.history_file, 'w') as f:
+                json.dump(self.history, f)
+        except OSError as e:
+            logger.warning(f"Could not save prefetch history: {e}")
+
+    def register_fetcher(self, kind: str, fetch: Callable[[], Any], ttl: float) -> None:
+        """Registers how to fetch a lookup in the background and how long the result stays fresh."""
+        self.fetchers[kind] = (fetch, ttl)
+
+    def record(self, query: str) -> Optional[str]:
+        """Logs a user query that asks for a routine lookup; returns its kind."""
+        kind = classify_lookup(query)
+        if kind:
+            oldest = time.time() - PREFETCH_HISTORY_DAYS * 86400
+            with self._lock:
+                self.history = [entry for entry in self.history if entry['t'] >= oldest]
+                self.history.append({'t': time.time(), 'kind': kind})
+                self._save_history()
+        return kind
+
+    def seed_from_chatlog(self, path: str = 'ChatLog.json') -> List[str]:
+        """
+        ChatLog has no timestamps, so it only tells which lookups are routine: kinds asked at
+        least PREFETCH_MIN_OCCURRENCES times are worth warming once at startup.
+        """
+        try:
+            with open(path, 'r') as f:
+                messages = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+        counts: Dict[str, int] = {}
+        for message in messages:
+            if message.get('role') == 'user':
+                kind = classify_lookup(message.get('content', ''))
+                if kind:
+                    counts[kind] = counts.get(kind, 0) + 1
+        return [kind for kind, count in sorted(counts.items(), key=lambda item: -item[1])
+                if count >= PREFETCH_MIN_OCCURRENCES]
+
+    def predictions(self) -> List[Tuple[str, int]]:
+        """(kind, typical minute of day) for every slot asked on enough distinct days."""
+        slots: Dict[Tuple[str, int], Dict[str, List[int]]] = {}
+        for entry in self.history:
+            minute = minute_of_day(entry['t'])
+            day = time.strftime('%Y-%m-%d', time.localtime(entry['t']))
+            slot = slots.setdefault((entry['kind'], minute // PREFETCH_SLOT_MINUTES), {})
+            slot.setdefault(day, []).append(minute)
+
+        predicted = []
+        for (kind, _), days in slots.items():
+            if len(days) >= PREFETCH_MIN_OCCURRENCES:
+                # Earliest request of each day: being ready for the first one is what matters
+                predicted.append((kind, int(median(min(minutes) for minutes in days.values()))))
+        return sorted(predicted, key=lambda item: item[1])
+
+    def _fetch(self, kind: str) -> bool:
+        fetch, _ = self.fetchers[kind]
+        with self._lock:
+            today = time.strftime('%Y-%m-%d')
+            if today != self._quota_day:
+                self._quota_day, self.quota_used = today, 0
+            if self.quota_used >= PREFETCH_DAILY_QUOTA:
+                logger.info(f"Prefetch quota reached, skipping {kind}")
+                return False
+            self.quota_used += 1
+
+        try:
+            value = fetch()
+        except Exception as e:
+            logger.warning(f"Prefetch of {kind} failed: {e}")
+            return False
+
+        with self._lock:
+            self._expire(kind)
+            self._values[kind] = {'value': value, 'fetched_at': time.time(), 'used': False}
+            self.prefetches += 1
+        logger.info(f"Prefetched {kind}")
+        return True
+
+    def _expire(self, kind: str) -> None:
+        """Drops a prefetched value past its TTL, counting it as waste if it was never used."""
+        entry = self._values.get(kind)
+        if entry and time.time() - entry['fetched_at'] > self.fetchers[kind][1]:
+            if not entry['used']:
+                self.wasted += 1
+            del self._values[kind]
+
+    def consume(self, kind: str) -> Optional[Any]:
+        """Returns a fresh prefetched value for the lookup (marking a hit), or None."""
+        with self._lock:
+            if kind not in self._values:
+                return None
+            self._expire(kind)
+            entry = self._values.get(kind)
+            if entry is None:
+                return None
+            if not entry['used']:
+                entry['used'] = True
+                self.hits += 1
+            return entry['value']
+
+    def check(self, now: float = None) -> List[str]:
+        """Fetches every predicted lookup whose prefetch time has come; returns the kinds fetched."""
+        now = now or time.time()
+        local = time.localtime(now)
+        current = local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec
+        today = time.strftime('%Y-%m-%d', time.localtime(now))
+
+        with self._lock:
+            for kind in list(self._values):
+                self._expire(kind)
+
+        fetched = []
+        for kind, expected in self.predictions():
+            if kind not in self.fetchers or self._done.get((kind, expected)) == today:
+                continue
+            # Close enough that the result is still fresh when the request comes, in seconds;
+            # never shorter than the check interval, or short TTLs (bitcoin) would fall between checks
+            lead = max(min(PREFETCH_LEAD_MINUTES * 60, self.fetchers[kind][1] / 2), PREFETCH_CHECK_INTERVAL)
+            if expected * 60 - lead <= current < expected * 60:
+                self._done[(kind, expected)] = today
+                if self._fetch(kind):
+                    fetched.append(kind)
+        return fetched
+
+    def start(self) -> None:
+        """Warms routine lookups found in ChatLog and starts the background scheduler."""
+        if not PREFETCH_ENABLED or (self._thread and self._thread.is_alive()):
+            return
+
+        def run():
+            for kind in self.seed_from_chatlog():
+                if kind in self.fetchers:
+                    self._fetch(kind)
+            while not self._stop.wait(PREFETCH_CHECK_INTERVAL):
+                try:
+                    self.check()
+                except Exception as e:
+                    logger.warning(f"Prefetch check failed: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name='prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Prefetch counters, hit rate and the current predictions."""
+        with self._lock:
+            settled = self.hits + self.wasted
+            return {
+                'prefetches': self.prefetches,
+                'hits': self.hits,
+                'wasted': self.wasted,
+                'hit_rate': self.hits / settled if settled else None,
+                'quota_used': self.quota_used,
+                'quota': PREFETCH_DAILY_QUOTA,
+                'predictions': [f"{kind}@{minute // 60:02d}:{minute % 60:02d}" for kind, minute in self.predictions()],
+            }
+
+
+# Global instance
+prefetcher = Prefetcher()
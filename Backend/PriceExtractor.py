@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Price Extraction Engine
+Finds prices and exchange rates in search snippets with one precompiled, single-pass scan
+"""
+
+import os
+import re
+import time
+import random
+from statistics import median
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+PRICE_FAST_ANSWER = os.getenv('PRICE_FAST_ANSWER', 'true').lower() != 'false'
+PRICE_AGREEMENT_TOLERANCE = float(os.getenv('PRICE_AGREEMENT_TOLERANCE', '0.005'))  # relative difference
+PRICE_MIN_SOURCES = int(os.getenv('PRICE_MIN_SOURCES', '2'))  # results that must agree
+PRICE_CONFIDENCE_THRESHOLD = float(os.getenv('PRICE_CONFIDENCE_THRESHOLD', '0.6'))  # share of results that agree
+
+# A number with Indian lakh grouping (1,43,383), Western grouping (143,383) or none, plus decimals
+NUMBER = r'(?:\d{1,3}(?:,\d{2})+,\d{3}|\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?'
+
+# One alternation, tried left to right at every position: specific forms before bare numbers
+PRICE_PATTERN = re.compile(
+    # 22K Gold/gram ₹11,992.86
+    rf'(?P<karat>\d{{2}})K\s+Gold[^₹\d]{{0,40}}₹?\s*(?P<gold>{NUMBER})'
+    # 1 USD equals 89.577504 INR
+    rf'|equals\s*(?P<rate_symbol>₹)?\s*(?P<rate>{NUMBER})\s*(?P<rate_unit>INR)?'
+    # ₹1,43,383  $63154.37 USD  Rs. 500
+    rf'|(?P<prefix>₹|\$|Rs\.?\s?)(?P<prefixed>{NUMBER})(?:\s*(?P<prefix_unit>USD|INR)\b)?'
+    # 89.577504 INR, but not the '1 USD' of '1 USD equals ...'
+    rf'|(?P<suffixed>{NUMBER})\s*(?P<suffix>INR|USD|rupees|dollars)\b(?!\s*(?:equals|=))'
+    # Bare grouped or decimal numbers: 1,43,383  89.58  63154.37
+    r'|(?P<bare>\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d{2,6}\.\d{1,6})',
+    re.IGNORECASE
+)
+
+UNITS = {'₹': 'INR', '$': 'USD', 'rs': 'INR', 'rs.': 'INR', 'inr': 'INR', 'rupees': 'INR',
+         'usd': 'USD', 'dollars': 'USD'}
+
+
+class PriceHit(NamedTuple):
+    text: str      # as written in the snippet
+    value: float   # normalized number
+    unit: str      # 'INR', 'USD' or '' when the snippet gives none
+    kind: str      # 'gold', 'rate', 'price' or 'number'
+    source: str    # title of the result the hit came from
+
+
+def normalize_number(text: str) -> float:
+    """'1,43,383.50' -> 143383.5"""
+    return float(text.replace(',', ''))
+
+
+def _unit(symbol: str) -> str:
+    return UNITS.get(symbol.strip().lower(), '') if symbol else ''
+
+
+def scan(text: str, source: str = '') -> List[PriceHit]:
+    """All price hits in one piece of text, in order of appearance."""
+    hits = []
+    for match in PRICE_PATTERN.finditer(text):
+        groups = match.groupdict()
+        if groups['gold']:
+            hits.append(PriceHit(match.group(0), normalize_number(groups['gold']), 'INR', 'gold', source))
+        elif groups['rate']:
+            unit = 'INR' if groups['rate_symbol'] or groups['rate_unit'] else ''
+            hits.append(PriceHit(match.group(0), normalize_number(groups['rate']), unit, 'rate', source))
+        elif groups['prefixed']:
+            unit = _unit(groups['prefix_unit']) or _unit(groups['prefix'])
+            hits.append(PriceHit(match.group(0), normalize_number(groups['prefixed']), unit, 'price', source))
+        elif groups['suffixed']:
+            hits.append(PriceHit(match.group(0), normalize_number(groups['suffixed']), _unit(groups['suffix']), 'price', source))
+        else:
+            hits.append(PriceHit(match.group(0), normalize_number(groups['bare']), '', 'number', source))
+    return hits
+
+
+def extract_prices(results: Iterable[Dict]) -> List[PriceHit]:
+    """
+    Scans title and body of every search result once and returns unique hits in order of
+    first appearance. Hits are unique by (value, unit): '₹11,992.86' and '11,992.86 INR' are one price.
+    """
+    seen = set()
+    hits = []
+    for result in results:
+        source = result.get('title', '')
+        for hit in scan(f"{source} {result.get('body', '')}", source):
+            key = (hit.value, hit.unit)
+            if key not in seen:
+                seen.add(key)
+                hits.append(hit)
+    return hits
+
+
+class PriceConsensus(NamedTuple):
+    value: float       # median of the agreeing values
+    unit: str
+    label: str         # '22K' for gold, '' otherwise
+    support: int       # results whose value agrees
+    total: int         # results with any plausible value
+    confidence: float  # support / total
+
+
+# Which hits count for a query category, and the range a real value lies in
+CONSENSUS_RULES = {
+    'currency': ({'rate', 'price'}, 'INR', (40, 200)),       # rupees per US dollar
+    'gold': ({'gold'}, 'INR', (1000, 50000)),                 # rupees per gram
+    'bitcoin': ({'price', 'number'}, 'USD', (1000, 10000000)),
+}
+
+ANSWER_TEMPLATES = {
+    'currency': "1 US dollar is about {value:,.2f} rupees right now, according to {support} of {total} sources.",
+    'gold': "{label} gold is about {value:,.2f} rupees per gram today, according to {support} of {total} sources.",
+    'bitcoin': "Bitcoin is trading at about {value:,.0f} US dollars, according to {support} of {total} sources.",
+}
+
+
+def price_consensus(results: Iterable[Dict], category: str) -> Optional[PriceConsensus]:
+    """
+    Scores how well the results agree on one value for the category. Every result votes with
+    its plausible hits; the value backed by the most results (within PRICE_AGREEMENT_TOLERANCE)
+    wins. Gold votes per karat, since 22K and 24K prices never agree.
+    """
+    if category not in CONSENSUS_RULES:
+        return None
+    kinds, unit, (low, high) = CONSENSUS_RULES[category]
+
+    votes = []  # one set of (label, value) per result
+    for result in results:
+        hits = scan(f"{result.get('title', '')} {result.get('body', '')}")
+        values = {(hit.text.split()[0].upper() if hit.kind == 'gold' else '', hit.value) for hit in hits
+                  if hit.kind in kinds and hit.unit in (unit, '') and low <= hit.value <= high}
+        if values:
+            votes.append(values)
+    if not votes:
+        return None
+
+    best = None
+    for label, value in {candidate for values in votes for candidate in values}:
+        agreeing = []
+        for values in votes:
+            close = [v for l, v in values if l == label and abs(v - value) <= PRICE_AGREEMENT_TOLERANCE * value]
+            if close:
+                agreeing.append(close[0])
+        if best is None or len(agreeing) > best.support or (len(agreeing) == best.support and label < best.label):
+            best = PriceConsensus(median(agreeing), unit, label, len(agreeing), len(votes), len(agreeing) / len(votes))
+    return best
+
+
+def price_answer(results: Iterable[Dict], category: str) -> Optional[str]:
+    """
+    Templated answer when enough results agree on the price, or None when the case is
+    ambiguous and should go to the language model.
+    """
+    consensus = price_consensus(results, category)
+    if (consensus is None or consensus.support < PRICE_MIN_SOURCES
+            or consensus.confidence < PRICE_CONFIDENCE_THRESHOLD):
+        return None
+    return ANSWER_TEMPLATES[category].format(**consensus._asdict())
+
+
+def _legacy_extract(results: List[Dict]) -> List[str]:
+    """The previous nine-pattern findall loop, kept for the benchmark below."""
+    price_patterns = [
+        r'₹\d{1,3}(?:,\d{3})*(?:\.\d{2})?',
+        r'\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?',
+        r'\d{1,3}\.\d{1,6}\s*(?:INR|₹)',
+        r'₹\d{1,3}\.\d{1,6}',
+        r'\$\d{1,6}(?:\.\d{2})?\s*USD',
+        r'equals\s*₹?\d{1,3}(?:\.\d{1,6})?\s*(?:INR|₹)?',
+        r'\d{1,3}(?:,\d{3})+(?:\.\d{2})?',
+        r'\d{2,6}\.\d{1,6}',
+        r'\d{2}K\s+Gold.*?₹?\d{1,3}(?:,\d{3})*(?:\.\d{2})?'
+    ]
+    extracted_info = []
+    for result in results:
+        text_to_search = result.get('title', '') + ' ' + result.get('body', '')
+        for pattern in price_patterns:
+            for match in re.findall(pattern, text_to_search, re.IGNORECASE):
+                if match not in extracted_info:
+                    extracted_info.append(match)
+    return extracted_info
+
+
+def synthetic_results(count: int, seed: int = 7) -> List[Dict]:
+    """Search results shaped like real gold, currency and bitcoin snippets."""
+    rng = random.Random(seed)
+    templates = [
+        "Today 22K Gold/gram ₹{lakh} and 24K Gold ₹{grouped} in Hyderabad.",
+        "1 USD equals {rate} INR as of today. Yesterday it was ₹{rate2}.",
+        "Bitcoin trades at ${grouped} USD, up {pct}.{pct2}% in 24 hours.",
+        "Silver costs Rs. {small} per 10 grams; platinum {grouped} INR.",
+    ]
+    results = []
+    for i in range(count):
+        lakh = f"{rng.randint(1, 9)},{rng.randint(10, 99)},{rng.randint(100, 999)}"
+        values = {
+            'lakh': lakh,
+            'grouped': f"{rng.randint(10, 99)},{rng.randint(100, 999)}.{rng.randint(10, 99)}",
+            'rate': f"{rng.randint(80, 95)}.{rng.randint(100000, 999999)}",
+            'rate2': f"{rng.randint(80, 95)}.{rng.randint(10, 99)}",
+            'pct': rng.randint(0, 9), 'pct2': rng.randint(10, 99),
+            'small': rng.randint(100, 999),
+        }
+        results.append({'title': f"Market update {i}", 'body': rng.choice(templates).format(**values)})
+    return results
+
+
+if __name__ == '__main__':
+    sample = [{'title': 'Gold Rate Today', 'body': '22K Gold/gram ₹11,992.86, 10 grams ₹1,19,928. 1 USD equals 89.577504 INR'}]
+    for hit in extract_prices(sample):
+        print(hit)
+
+    for count in (100, 1000, 10000):
+        results = synthetic_results(count)
+        start = time.perf_counter()
+        legacy = _legacy_extract(results)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hits = extract_prices(results)
+        engine_time = time.perf_counter() - start
+
+        print(f"{count:>6} results: legacy {legacy_time * 1000:8.1f} ms ({len(legacy)} matches), "
+              f"engine {engine_time * 1000:7.1f} ms ({len(hits)} hits), {legacy_time / engine_time:.1f}x")
@@ -1,15 +1,21 @@
 import json
-import re
 import requests
 import logging
 from dotenv import load_dotenv
 from os import environ
-from ddgs import DDGS
 from groq import Groq
 import google.genai as genai
 
 # Import the AI Client Manager
 from .AIClientManager import get_ai_response
+from .Cancellation import QueryCancelled
+from .SearchCache import search_cache, CATEGORY_TTLS
+from .SearchFanout import search_fanout
+from .PriceExtractor import extract_prices, price_answer, PRICE_FAST_ANSWER
+from .SearchIndex import search_index
+from .SnippetRanker import build_context
+from .Prefetch import prefetcher
+from .PageFetcher import page_fetcher, PAGE_FETCH_ENABLED
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -34,91 +40,133 @@ except (FileNotFoundError, json.JSONDecodeError):
         json.dump(default_messages, f, indent=4)
     messages = default_messages
 
+# The local index answers alongside the web sources for general and news queries
+search_fanout.register_source('local', lambda search_query, deadline: search_index.search(search_query))
+
+PRICE_WORDS = ['price', 'rate', 'exchange', 'cost', 'value', 'gold', 'bitcoin', 'usd', 'inr']
+NEWS_WORDS = ['news', 'latest', 'today', 'score', 'headlines', 'update', 'election', 'weather']
+
+def build_search_query(query: str) -> tuple:
+    """Rewrites the query for better results and returns (search_query, category)."""
+    query_lower = query.lower()
+
+    # Enhance search queries for better results
+    if 'gold price' in query_lower or 'gold rate' in query_lower:
+        return "gold price today per gram INR live", 'gold'
+    elif 'usd to inr' in query_lower or 'dollar to rupee' in query_lower or 'usd inr' in query_lower:
+        return "USD to INR exchange rate today live", 'currency'
+    elif 'bitcoin' in query_lower or 'btc' in query_lower:
+        return "bitcoin price today USD live", 'bitcoin'
+    elif 'cryptocurrency' in query_lower or 'crypto' in query_lower:
+        return query + " price today USD live", 'crypto'
+    elif 'exchange rate' in query_lower:
+        return query + " today live", 'exchange'
+    elif 'price' in query_lower or 'rate' in query_lower:
+        return query + " today live", 'price'
+    elif any(word in query_lower for word in NEWS_WORDS):
+        return query, 'news'
+    else:
+        return query, 'general'
+
+def fetch_search_results(search_query: str, category: str = 'general') -> list:
+    """Runs the web search for an already rewritten query across all sources, bounded by a deadline."""
+    results = search_fanout.search(search_query, category)
+    # Everything fetched from the web is kept in the local index for related and offline questions
+    search_index.add_results(search_query, category, [result for result in results if result.get('source') != 'local'])
+    return results
+
+def format_search_results(results: list, query: str) -> str:
+    """Formats search results for the answer model, extracting prices for price queries."""
+    query_lower = query.lower()
+
+    # For price/currency queries, try to extract specific information
+    if any(word in query_lower for word in PRICE_WORDS):
+        return extract_price_info(results, query)
+    else:
+        # General search results
+        answer = f"Search results for '{query}':\n\n"
+        for i, result in enumerate(results, 1):
+            title = result.get('title', 'No title')
+            body = result.get('body', 'No description')
+
+            answer += f"{i}. {title}\n"
+            answer += f"   {body[:200]}{'...' if len(body) > 200 else ''}\n\n"
+
+        return answer
+
+def SearchResults(query: str, prefer_local: bool = False) -> list:
+    """
+    Search results for the query: fresh local index hits when prefer_local is set and there are
+    enough of them, otherwise the (cached) web search, falling back to the index when offline.
+    """
+    search_query, category = build_search_query(query)
+    # Routine lookups may already have been fetched in the background moments ago
+    prefetched = prefetcher.consume(category)
+    if prefetched:
+        logger.info(f"Answering '{query}' from prefetched results")
+        return prefetched
+
+    if prefer_local:
+        hits = search_index.fresh_hits(query, category)
+        if hits:
+            logger.info(f"Answering '{query}' from fresh local index hits")
+            return hits
+
+    # Repeated lookups are served from the search cache within the category's TTL
+    results = search_cache.get_or_fetch(search_query, category, lambda: fetch_search_results(search_query, category))
+    if not results:
+        # Offline or nothing found: fall back to whatever the local index remembers
+        results = search_index.search(query)
+        if results:
+            logger.info(f"Answering '{query}' from the local search index")
+    return results
+
+def prefetch_search(query: str) -> list:
+    """Background fetch of a routine lookup; also warms the search cache for the same question."""
+    search_query, category = build_search_query(query)
+    results = fetch_search_results(search_query, category)
+    search_cache.put(search_query, results, category)
+    return results
+
+# Gold, USD to INR and bitcoin are rewritten to fixed search queries, so one fetch serves every phrasing
+for kind, routine_query in (('gold', 'gold price'), ('currency', 'usd to inr'), ('bitcoin', 'bitcoin price')):
+    prefetcher.register_fetcher(kind, lambda routine_query=routine_query: prefetch_search(routine_query), CATEGORY_TTLS[kind])
+
 def GoogleSearch(query: str) -> str:
     """Performs a search using DuckDuckGo for real-time information."""
     try:
-        # Improve search terms for better results
-        query_lower = query.lower()
-
-        # Enhance search queries for better results
-        if 'gold price' in query_lower or 'gold rate' in query_lower:
-            search_query = "gold price today per gram INR live"
-        elif 'usd to inr' in query_lower or 'dollar to rupee' in query_lower or 'usd inr' in query_lower:
-            search_query = "USD to INR exchange rate today live"
-        elif 'bitcoin' in query_lower or 'btc' in query_lower:
-            search_query = "bitcoin price today USD live"
-        elif 'cryptocurrency' in query_lower or 'crypto' in query_lower:
-            search_query = query + " price today USD live"
-        elif 'exchange rate' in query_lower:
-            search_query = query + " today live"
-        elif 'price' in query_lower or 'rate' in query_lower:
-            search_query = query + " today live"
-        else:
-            search_query = query
-
-        # Use DuckDuckGo search
-        with DDGS() as ddgs:
-            results = list(ddgs.text(search_query, max_results=5))
-
+        results = SearchResults(query)
         if not results:
             return f"Sorry, I couldn't find information about '{query}'."
+        return format_search_results(results, query)
 
-        # For price/currency queries, try to extract specific information
-        if any(word in query_lower for word in ['price', 'rate', 'exchange', 'cost', 'value', 'gold', 'bitcoin', 'usd', 'inr']):
-            return extract_price_info(results, query)
-        else:
-            # General search results
-            answer = f"Search results for '{query}':\n\n"
-            for i, result in enumerate(results, 1):
-                title = result.get('title', 'No title')
-                body = result.get('body', 'No description')
-
-                answer += f"{i}. {title}\n"
-                answer += f"   {body[:200]}{'...' if len(body) > 200 else ''}\n\n"
-
-            return answer
+    except Exception as e:
+        return f"Sorry, I couldn't perform the search. Error: {str(e)}"
 
+def RealtimeContext(query: str, results: list = None) -> str:
+    """
+    Compact search context for the answer model: extracted prices for price queries, otherwise
+    only the best-ranked, de-duplicated passages within REALTIME_CONTEXT_TOKENS.
+    """
+    try:
+        results = results if results is not None else SearchResults(query, prefer_local=True)
     except Exception as e:
         return f"Sorry, I couldn't perform the search. Error: {str(e)}"
+    if not results:
+        return f"Sorry, I couldn't find information about '{query}'."
+    if any(word in query.lower() for word in PRICE_WORDS):
+        return extract_price_info(results, query)
+    if PAGE_FETCH_ENABLED:
+        # Ground the answer in the text of the top pages rather than their short snippets
+        results = page_fetcher.enrich(results)
+    return build_context(query, results)
 
 def extract_price_info(results, query):
     """Extract and format price information from search results."""
     query_lower = query.lower()
-    extracted_info = []
-
-    # Define patterns for different types of prices
-    price_patterns = [
-        # Gold prices: ₹1,43,383, ₹11,992.86, etc.
-        r'₹\d{1,3}(?:,\d{3})*(?:\.\d{2})?',
-        r'\$\d{1,3}(?:,\d{3})*(?:\.\d{2})?',
-        # Currency exchange rates: 89.577504 INR, ₹89.58
-        r'\d{1,3}\.\d{1,6}\s*(?:INR|₹)',
-        r'₹\d{1,3}\.\d{1,6}',
-        # Bitcoin prices: $63154.37 USD
-        r'\$\d{1,6}(?:\.\d{2})?\s*USD',
-        # Exchange rate formats: 1 USD equals 89.577504 INR
-        r'equals\s*₹?\d{1,3}(?:\.\d{1,6})?\s*(?:INR|₹)?',
-        # Large numbers with commas: 1,43,383
-        r'\d{1,3}(?:,\d{3})+(?:\.\d{2})?',
-        # Decimal numbers: 89.58, 63154.37
-        r'\d{2,6}\.\d{1,6}',
-        # Gold purity formats: 22K Gold/gram 16, 11,992.86
-        r'\d{2}K\s+Gold.*?₹?\d{1,3}(?:,\d{3})*(?:\.\d{2})?'
-    ]
-
-    for result in results:
-        body = result.get('body', '')
-        title = result.get('title', '')
-
-        # Search in both title and body
-        text_to_search = title + ' ' + body
-
-        for pattern in price_patterns:
-            matches = re.findall(pattern, text_to_search, re.IGNORECASE)
-            if matches:
-                for match in matches:
-                    if match not in extracted_info:
-                        extracted_info.append(match)
+
+    # One precompiled scan per result; hits are unique by normalized value and unit
+    extracted_info = [f"{hit.text} ({hit.source})" if hit.source else hit.text for hit in extract_prices(results)]
 
     if extracted_info:
         # Format the response based on query type
@@ -157,7 +205,7 @@ def AnswerModifier(answer: str) -> str:
     modified_answer = '\n'.join(non_empty_lines)
     return modified_answer
 
-def RealTimeChatBotAI(prompt: str) -> str:
+def RealTimeChatBotAI(prompt: str, cancel_token=None) -> str:
     """Processes the user query, performs a real-time search, and returns the chatbot's response."""
     global messages
     
@@ -168,8 +216,23 @@ def RealTimeChatBotAI(prompt: str) -> str:
     except (FileNotFoundError, json.JSONDecodeError):
         messages = default_messages
     
-    # Add Google Search results to SystemChat
-    search_results = GoogleSearch(prompt)
+    results = None
+    category = build_search_query(prompt)[1]
+    if PRICE_FAST_ANSWER and category in ('gold', 'currency', 'bitcoin'):
+        # When the results agree on the price, a templated answer is as good as the model's
+        try:
+            results = SearchResults(prompt, prefer_local=True)
+        except Exception as e:
+            logger.warning(f"Search for a fast price answer failed: {e}")
+        answer = price_answer(results or [], category)
+        if answer:
+            logger.info(f"Answered '{prompt}' from agreeing search results without the model")
+            return answer
+
+    # Add ranked search passages to SystemChat, from the local index when it has fresh enough hits
+    search_results = RealtimeContext(prompt, results)
+    if cancel_token:
+        cancel_token.raise_if_cancelled()
     system_message = {'role': 'system', 'content': search_results}
     system_chat = [{'role': 'system', 'content': f"Hello, I am {environ['NickName']}, You are a very accurate and advanced AI chatbot named {environ['AssistantName']} which has real-time up-to-date information from the internet.\n*** Just answer the question from the provided data in a professional way. ***"}]
     system_chat.append(system_message)
@@ -184,7 +247,8 @@ def RealTimeChatBotAI(prompt: str) -> str:
             model='llama-3.3-70b-versatile',
             temperature=0.3,
             max_tokens=2048,
-            stream=True
+            stream=True,
+            cancel_token=cancel_token
         )
 
         # Clean up the response
@@ -193,6 +257,8 @@ def RealTimeChatBotAI(prompt: str) -> str:
 
         return AnswerModifier(answer)
 
+    except QueryCancelled:
+        raise
     except Exception as e:
         logger.error(f"All AI services failed in RealTimeChatBotAI: {e}")
         return f"I'm sorry, all AI services are currently unavailable. Please try again later."
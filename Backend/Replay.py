@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Record and Replay
+Records every outbound call of a live session to a JSONL fixture and replays it offline with realistic timing
+"""
+
+import os
+import json
+import math
+import time
+import random
+import base64
+import asyncio
+import hashlib
+import logging
+import argparse
+import builtins
+import functools
+import threading
+from collections import deque
+from statistics import median
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+IO_MODE = os.getenv('IO_MODE', 'live').lower()  # live, record or replay
+IO_FIXTURES = os.getenv('IO_FIXTURES', os.path.join('Fixtures', 'session.jsonl'))
+# 'recorded', 'none', or JSON per service: {"groq": "normal:0.8,0.2", "edge": 0.3, "default": "recorded"}
+REPLAY_LATENCY = os.getenv('REPLAY_LATENCY', 'recorded')
+REPLAY_SEED = int(os.getenv('REPLAY_SEED', '0'))
+
+# Services recorded as token streams; their latency summary is time to first token
+STREAM_SERVICES = {'groq', 'cohere_chat'}
+
+
+class FixtureMissing(LookupError):
+    """No recording matches a call made during replay."""
+
+
+class RecordedError(RuntimeError):
+    """Replayed failure whose original exception type is not a builtin."""
+
+
+def request_key(service: str, request: Any) -> str:
+    payload = json.dumps([service, request], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def encode(value: Any) -> Any:
+    """JSON-safe form of a response: bytes become base64, tuples are tagged."""
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, tuple):
+        return {'__tuple__': [encode(item) for item in value]}
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode(item) for key, item in value.items()}
+    return value
+
+
+def decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if isinstance(value, dict):
+        if '__bytes__' in value:
+            return base64.b64decode(value['__bytes__'])
+        if '__tuple__' in value:
+            return tuple(decode(item) for item in value['__tuple__'])
+        return {key: decode(item) for key, item in value.items()}
+    return value
+
+
+def parse_latency(spec: Any) -> Callable[[random.Random, float], float]:
+    """
+    Latency model from a spec: 'recorded', 'none', seconds, 'normal:mean,std',
+    'lognormal:median,sigma' or 'uniform:low,high'. Returns f(rng, recorded_seconds) -> seconds.
+    """
+    if spec in (None, 'recorded'):
+        return lambda rng, recorded: recorded
+    if spec == 'none':
+        return lambda rng, recorded: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda rng, recorded: float(spec)
+
+    name, _, args = str(spec).partition(':')
+    values = [float(arg) for arg in args.split(',') if arg]
+    if name == 'normal':
+        return lambda rng, recorded: max(0.0, rng.gauss(values[0], values[1]))
+    if name == 'lognormal':
+        mu = math.log(values[0])
+        return lambda rng, recorded: rng.lognormvariate(mu, values[1])
+    if name == 'uniform':
+        return lambda rng, recorded: rng.uniform(values[0], values[1])
+    raise ValueError(f"Unknown replay latency spec: {spec}")
+
+
+class ReplayTransport:
+    """
+    In record mode, calls go out as usual and each response (or failure) is appended to the
+    fixture with its latency; streams keep the arrival time of every token. In replay mode
+    nothing leaves the machine: responses come from the fixture, matched by service and request,
+    after a simulated delay. Calls whose request differs (random seeds, a longer chat history)
+    fall back to the next unused recording of the same service, in recording order.
+    """
+
+    def __init__(self, mode: str = None, path: str = None, latency: str = None, seed: int = None):
+        self.mode = (mode or IO_MODE).lower()
+        self.path = path or IO_FIXTURES
+        self._rng = random.Random(REPLAY_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, Deque[Dict]] = {}
+        self._by_service: Dict[str, Deque[Dict]] = {}
+
+        self._latency = self._parse_latency_config(latency or REPLAY_LATENCY)
+
+        self.recorded = 0
+        self.replayed = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+        if self.mode == 'replay':
+            self._load()
+        elif self.mode == 'record':
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        elif self.mode != 'live':
+            raise ValueError(f"IO_MODE must be live, record or replay, not {self.mode!r}")
+
+    @staticmethod
+    def _parse_latency_config(latency: str) -> Dict[str, Callable[[random.Random, float], float]]:
+        """
+        Latency model per service from REPLAY_LATENCY. A malformed setting is logged and replaced
+        by no injected latency; a malformed per-service entry is logged and skipped.
+        """
+        try:
+            specs = json.loads(latency) if latency.strip().startswith('{') else {'default': latency}
+        except json.JSONDecodeError as e:
+            logger.error(f"Ignoring REPLAY_LATENCY, not valid JSON: {e}")
+            return {'default': parse_latency('none')}
+
+        models = {}
+        for service, spec in specs.items():
+            try:
+                models[service] = parse_latency(spec)
+                models[service](random.Random(0), 0.0)  # catches missing or non-positive parameters
+            except (ValueError, IndexError) as e:
+                logger.error(f"Ignoring REPLAY_LATENCY entry {service!r} ({spec!r}): {e}")
+                models.pop(service, None)
+        if not models:
+            models['default'] = parse_latency('none')
+        return models
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            logger.error(f"Replay fixture {self.path} not found; every external call will fail")
+            records = []
+        for record in records:
+            self._by_key.setdefault(record['key'], deque()).append(record)
+            self._by_service.setdefault(record['service'], deque()).append(record)
+        logger.info(f"Loaded {len(records)} recorded calls from {self.path}")
+
+    def _write(self, record: Dict) -> None:
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.recorded += 1
+
+    def _take(self, service: str, key: str) -> Dict:
+        """Next recording for the call: same request first, else the next one of the service."""
+        with self._lock:
+            queue = self._by_key.get(key) or deque()
+            by_service = self._by_service.get(service) or deque()
+            # Recordings already taken through the other queue are skipped
+            while queue and queue[0].get('_used'):
+                queue.popleft()
+            while by_service and by_service[0].get('_used'):
+                by_service.popleft()
+
+            record = None
+            if queue:
+                record = queue.popleft()
+            else:
+                record = next((r for r in by_service if not r.get('_used')), None)
+                if record:
+                    self.fallbacks += 1
+            if record is None:
+                self.misses += 1
+                raise FixtureMissing(f"No recording for {service} call {key[:12]}")
+            record['_used'] = True
+            self.replayed += 1
+            return record
+
+    def delay(self, service: str, recorded: float) -> float:
+        model = self._latency.get(service) or self._latency.get('default') or parse_latency('recorded')
+        with self._lock:
+            return model(self._rng, recorded)
+
+    @staticmethod
+    def _error(record: Dict) -> Exception:
+        error_type = getattr(builtins, record['error']['type'], None)
+        if isinstance(error_type, type) and issubclass(error_type, Exception):
+            return error_type(record['error']['message'])
+        return RecordedError(f"{record['error']['type']}: {record['error']['message']}")
+
+    def _record(self, service: str, key: str, request: Any, start: float, response: Any = None,
+                error: Exception = None) -> None:
+        record = {'service': service, 'key': key, 'request': encode(request),
+                  'latency': round(time.perf_counter() - start, 4), 'recorded_at': time.time()}
+        if error is not None:
+            record['error'] = {'type': type(error).__name__, 'message': str(error)}
+        else:
+            record['response'] = encode(response)
+        self._write(record)
+
+    def call(self, service: str, request: Any, live: Callable[[], Any]) -> Any:
+        """Runs live() (recording it in record mode) or returns its recorded result in replay mode."""
+        if self.mode == 'live':
+            return live()
+
+        key = request_key(service, request)
+        if self.mode == 'replay':
+            record = self._take(service, key)
+            time.sleep(self.delay(service, record['latency']))
+            if 'error' in record:
+                raise self._error(record)
+            return decode(record['response'])
+
+        start = time.perf_counter()
+        try:
+            response = live()
+        except Exception as e:
+            self._record(service, key, request, start, error=e)
+            raise
+        self._record(service, key, request, start, response)
+        return response
+
+    async def acall(self, service: str, request: Any, live: Callable[[], Any]) -> Any:
+        """call() for coroutines: live is a coroutine function and the replay delay does not block the loop."""
+        if self.mode == 'live':
+            return await live()
+
+        key = request_key(service, request)
+        if self.mode == 'replay':
+            record = self._take(service, key)
+            await asyncio.sleep(self.delay(service, record['latency']))
+            if 'error' in record:
+                raise self._error(record)
+            return decode(record['response'])
+
+        start = time.perf_counter()
+        try:
+            response = await live()
+        except Exception as e:
+            self._record(service, key, request, start, error=e)
+            raise
+        self._record(service, key, request, start, response)
+        return response
+
+    def stream(self, service: str, request: Any, live: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """
+        Token stream of live() or its recording. Replay reproduces the first-token delay (or
+        samples it from the configured distribution) and the recorded gaps between tokens.
+        Streams abandoned before the end (cancellation) are not recorded.
+        """
+        if self.mode == 'live':
+            yield from live()
+            return
+
+        key = request_key(service, request)
+        if self.mode == 'replay':
+            record = self._take(service, key)
+            if 'error' in record:
+                time.sleep(self.delay(service, record['latency']))
+                raise self._error(record)
+            tokens = record['response']
+            previous = 0.0
+            for i, (offset, token) in enumerate(tokens):
+                time.sleep(self.delay(service, offset) if i == 0 else max(0.0, offset - previous))
+                previous = offset
+                yield token
+            return
+
+        start = time.perf_counter()
+        tokens = []
+        live_tokens = live()
+        try:
+            for token in live_tokens:
+                tokens.append([round(time.perf_counter() - start, 4), token])
+                yield token
+        except Exception as e:
+            self._record(service, key, request, start, error=e)
+            raise
+        finally:
+            # Abandoning the stream closes the live one too
+            live_tokens.close()
+        self._record(service, key, request, start, tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'mode': self.mode, 'recorded': self.recorded, 'replayed': self.replayed,
+                'fallbacks': self.fallbacks, 'misses': self.misses}
+
+
+# Global instance
+transport = ReplayTransport()
+
+
+def replayable(service: str, request: Callable[..., Any] = None):
+    """
+    Routes a function (sync or async) through the transport. request(*args, **kwargs) builds the
+    part of the call that identifies it (no API keys, timeouts or other volatile arguments);
+    by default all arguments are used.
+    """
+    def build(args, kwargs):
+        return request(*args, **kwargs) if request else {'args': list(args), 'kwargs': kwargs}
+
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                return await transport.acall(service, build(args, kwargs), lambda: function(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return transport.call(service, build(args, kwargs), lambda: function(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def summarize(path: str) -> Dict[str, Dict[str, float]]:
+    """Call count, failures and latency percentiles per service in a fixture."""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            service = record['service']
+            if service in STREAM_SERVICES and record.get('response'):
+                latency = record['response'][0][0]
+            else:
+                latency = record['latency']
+            latencies.setdefault(service, []).append(latency)
+            errors[service] = errors.get(service, 0) + ('error' in record)
+
+    summary = {}
+    for service, values in sorted(latencies.items()):
+        values.sort()
+        summary[service] = {
+            'calls': len(values),
+            'errors': errors[service],
+            'median': median(values),
+            'p95': values[min(len(values) - 1, int(0.95 * len(values)))],
+            'total': sum(values),
+        }
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-service call counts and latencies of a recorded session')
+    parser.add_argument('fixture', nargs='?', default=IO_FIXTURES)
+    args = parser.parse_args()
+
+    print(f"{'service':<14}{'calls':>6}{'errors':>7}{'median':>9}{'p95':>9}{'total':>9}")
+    for service, row in summarize(args.fixture).items():
+        print(f"{service:<14}{row['calls']:>6}{row['errors']:>7}{row['median']:>8.3f}s{row['p95']:>8.3f}s{row['total']:>8.2f}s")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Search Result Cache
+Keeps realtime search results keyed by the rewritten search query, with TTLs per query category
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Seconds a result stays fresh, per category detected by RSE.build_search_query
+CATEGORY_TTLS = {
+    'bitcoin': 60,
+    'crypto': 60,
+    'currency': 300,
+    'exchange': 300,
+    'gold': 600,
+    'price': 600,
+    'news': 900,
+    'general': 6 * 3600,  # encyclopedic lookups barely change
+}
+
+
+def load_ttl_overrides(raw: str) -> Dict[str, float]:
+    """
+    Parses the SEARCH_CACHE_TTLS override: a JSON object mapping categories to seconds.
+    Malformed JSON and entries that are not non-negative numbers are logged and ignored.
+    """
+    try:
+        overrides = json.loads(raw or '{}')
+    except json.JSONDecodeError as e:
+        logger.error(f"Ignoring SEARCH_CACHE_TTLS, not valid JSON: {e}")
+        return {}
+    if not isinstance(overrides, dict):
+        logger.error("Ignoring SEARCH_CACHE_TTLS, expected a JSON object of category -> seconds")
+        return {}
+
+    valid = {}
+    for category, ttl in overrides.items():
+        if isinstance(ttl, (int, float)) and not isinstance(ttl, bool) and ttl >= 0:
+            valid[category] = ttl
+        else:
+            logger.error(f"Ignoring SEARCH_CACHE_TTLS entry {category!r}, expected a number of seconds")
+    return valid
+
+
+CATEGORY_TTLS.update(load_ttl_overrides(os.getenv('SEARCH_CACHE_TTLS', '{}')))
+
+# A stale entry is still served (and refreshed in the background) until ttl * (1 + STALE_FACTOR)
+SEARCH_CACHE_STALE_FACTOR = float(os.getenv('SEARCH_CACHE_STALE_FACTOR', '1.0'))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv('SEARCH_CACHE_MAX_BYTES', str(5 * 1024 * 1024)))
+
+
+def cache_key(search_query: str) -> str:
+    """Case- and whitespace-insensitive key for a search query."""
+    return ' '.join(search_query.lower().split())
+
+
+class SearchCache:
+    """
+    LRU cache of search results with per-category TTLs and stale-while-revalidate:
+    expired-but-recent entries are returned immediately while one background refresh runs.
+    Entries are evicted least recently used first once their estimated size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = None, stale_factor: float = None, ttls: Dict[str, float] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else SEARCH_CACHE_MAX_BYTES
+        self.stale_factor = stale_factor if stale_factor is not None else SEARCH_CACHE_STALE_FACTOR
+        self.ttls = ttls or CATEGORY_TTLS
+        self.enabled = os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() != 'false'
+
+        # key -> (results, stored_at, category, size)
+        self._entries: "OrderedDict[str, Tuple[Any, float, str, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def ttl(self, category: str) -> float:
+        return self.ttls.get(category, self.ttls['general'])
+
+    def _store(self, key: str, results: Any, category: str) -> None:
+        size = len(json.dumps(results, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[3]
+            self._entries[key] = (results, time.time(), category, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (_, _, _, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted
+
+    def _lookup(self, key: str, category: str) -> Tuple[Optional[Any], str]:
+        """Returns (results, 'fresh' | 'stale' | 'miss')."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, 'miss'
+            results, stored_at, _, _ = entry
+            age = time.time() - stored_at
+            ttl = self.ttl(category)
+            if age <= ttl:
+                self._entries.move_to_end(key)
+                return results, 'fresh'
+            if age <= ttl * (1 + self.stale_factor):
+                self._entries.move_to_end(key)
+                return results, 'stale'
+            self._total_bytes -= self._entries.pop(key)[3]
+            return None, 'miss'
+
+    def get(self, search_query: str, category: str = 'general') -> Optional[Any]:
+        """Returns fresh cached results, or None. Does not trigger a refresh."""
+        results, status = self._lookup(cache_key(search_query), category)
+        return results if status == 'fresh' else None
+
+    def put(self, search_query: str, results: Any, category: str = 'general') -> None:
+        """Stores results for the search query. Empty results are not cached."""
+        if self.enabled and results:
+            self._store(cache_key(search_query), results, category)
+
+    def get_or_fetch(self, search_query: str, category: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Returns cached results when fresh; stale results while a background refresh runs;
+        otherwise calls fetch(), caches and returns its results.
+        """
+        if not self.enabled:
+            return fetch()
+
+        key = cache_key(search_query)
+        results, status = self._lookup(key, category)
+        if status == 'fresh':
+            self.hits += 1
+            return results
+        if status == 'stale':
+            self.stale_hits += 1
+            self._refresh_in_background(key, category, fetch)
+            return results
+
+        self.misses += 1
+        results = fetch()
+        if results:
+            self._store(key, results, category)
+        return results
+
+    def _refresh_in_background(self, key: str, category: str, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                results = fetch()
+                if results:
+                    self._store(key, results, category)
+                    self.refreshes += 1
+            except Exception as e:
+                logger.warning(f"Background search refresh failed for '{key}': {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name='search-cache-refresh', daemon=True).start()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns entry count, estimated size and hit/miss counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+            }
+
+
+# Global instance
+search_cache = SearchCache()
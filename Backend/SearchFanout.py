@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Parallel Search Fan-Out
+Queries several search sources concurrently under a deadline and merges their results
+"""
+
+import os
+import re
+import math
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from statistics import median
+from typing import Callable, Deque, Dict, List
+from urllib.parse import quote, urlparse, parse_qsl, urlencode
+from ddgs import DDGS
+from dotenv import load_dotenv
+
+from .ConnectionPool import get_session
+from .Replay import replayable
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DEADLINE = float(os.getenv('SEARCH_DEADLINE', '2.5'))  # seconds
+SEARCH_SOURCE_WORKERS = int(os.getenv('SEARCH_SOURCE_WORKERS', '2'))  # threads per source
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '8'))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('SEARCH_NEAR_DUPLICATE_THRESHOLD', '0.6'))
+
+WIKIPEDIA_URL = 'https://en.wikipedia.org'
+
+# Sources queried per category from RSE.build_search_query; unknown categories use 'general'
+SOURCES_BY_CATEGORY = {
+    'general': ['ddgs_text', 'wikipedia', 'local'],
+    'news': ['ddgs_text', 'ddgs_news', 'local'],
+    'price': ['ddgs_text', 'ddgs_news'],  # old prices from the local index would compete with live ones
+}
+PRICE_CATEGORIES = {'gold', 'currency', 'bitcoin', 'crypto', 'exchange', 'price'}
+
+TRACKING_PARAMS = re.compile(r'^(utm_|fbclid$|gclid$|ref$)')
+WORD = re.compile(r'\w+')
+
+
+@replayable('ddgs_text', lambda search_query, deadline: {'query': search_query})
+def ddgs_text(search_query: str, deadline: float) -> List[Dict]:
+    # DDGS takes whole seconds
+    with DDGS(timeout=max(1, math.ceil(deadline))) as ddgs:
+        return [{'title': r.get('title', ''), 'body': r.get('body', ''), 'href': r.get('href', '')}
+                for r in ddgs.text(search_query, max_results=5)]
+
+
+@replayable('ddgs_news', lambda search_query, deadline: {'query': search_query})
+def ddgs_news(search_query: str, deadline: float) -> List[Dict]:
+    with DDGS(timeout=max(1, math.ceil(deadline))) as ddgs:
+        return [{'title': r.get('title', ''), 'body': r.get('body', ''), 'href': r.get('url', ''),
+                 'date': r.get('date', '')}
+                for r in ddgs.news(search_query, max_results=3)]
+
+
+@replayable('wikipedia', lambda search_query, deadline: {'query': search_query})
+def wikipedia_summary(search_query: str, deadline: float) -> List[Dict]:
+    """Lead section of the best-matching Wikipedia article; both requests share the deadline."""
+    session = get_session()
+    expires_at = time.perf_counter() + deadline
+    response = session.get(f'{WIKIPEDIA_URL}/w/rest.php/v1/search/title',
+                           params={'q': search_query, 'limit': 1}, timeout=deadline)
+    response.raise_for_status()
+    pages = response.json().get('pages', [])
+    if not pages:
+        return []
+
+    key = pages[0]['key']
+    remaining = expires_at - time.perf_counter()
+    if remaining <= 0:
+        raise TimeoutError('Wikipedia search used up the deadline')
+    response = session.get(f'{WIKIPEDIA_URL}/api/rest_v1/page/summary/{quote(key, safe="")}', timeout=remaining)
+    response.raise_for_status()
+    summary = response.json()
+    if summary.get('type') == 'disambiguation' or not summary.get('extract'):
+        return []
+    return [{'title': summary.get('title', key), 'body': summary['extract'],
+             'href': summary.get('content_urls', {}).get('desktop', {}).get('page', f'{WIKIPEDIA_URL}/wiki/{key}')}]
+
+
+def normalize_url(url: str) -> str:
+    """Scheme-, www-, trailing-slash- and tracking-parameter-insensitive form of a URL."""
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower().removeprefix('www.').removeprefix('m.')
+    query = urlencode([(k, v) for k, v in parse_qsl(parsed.query) if not TRACKING_PARAMS.match(k)])
+    return f"{host}{parsed.path.rstrip('/')}{'?' + query if query else ''}"
+
+
+def shingles(text: str, size: int = 3) -> set:
+    words = WORD.findall(text.lower())
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def merge_results(per_source: List[List[Dict]], max_results: int = None,
+                  threshold: float = None) -> List[Dict]:
+    """
+    Interleaves the sources rank by rank (in source priority order) and drops results whose
+    URL was already seen or whose snippet is a near-duplicate of one already kept.
+    """
+    max_results = max_results or SEARCH_MAX_RESULTS
+    threshold = threshold if threshold is not None else NEAR_DUPLICATE_THRESHOLD
+
+    merged, seen_urls, kept_shingles = [], set(), []
+    for rank in range(max((len(results) for results in per_source), default=0)):
+        for results in per_source:
+            if rank >= len(results) or len(merged) >= max_results:
+                continue
+            result = results[rank]
+            url = normalize_url(result.get('href', '')) if result.get('href') else None
+            if url and url in seen_urls:
+                continue
+            content = shingles(f"{result.get('title', '')} {result.get('body', '')}")
+            if any(jaccard(content, other) >= threshold for other in kept_shingles):
+                continue
+            if url:
+                seen_urls.add(url)
+            kept_shingles.append(content)
+            merged.append(result)
+    return merged
+
+
+class SearchFanout:
+    """
+    Runs the sources for a query in parallel and returns what arrived before the deadline,
+    so tail latency is bounded by the deadline rather than by the slowest source.
+    Each source has its own small thread pool and is given only the time left before the
+    deadline as its request timeout, so a hung source cannot hold threads other sources need.
+    """
+
+    def __init__(self, deadline: float = None, workers_per_source: int = None):
+        self.deadline = deadline or SEARCH_DEADLINE
+        self.workers_per_source = workers_per_source or SEARCH_SOURCE_WORKERS
+        self.sources: Dict[str, Callable[[str, float], List[Dict]]] = {
+            'ddgs_text': ddgs_text,
+            'ddgs_news': ddgs_news,
+            'wikipedia': wikipedia_summary,
+        }
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._latency: Dict[str, Deque[float]] = {}
+        self._timeouts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def register_source(self, name: str, source: Callable[[str, float], List[Dict]]) -> None:
+        """Adds or replaces a source: source(search_query, deadline) -> [{'title', 'body', 'href'}]."""
+        self.sources[name] = source
+
+    def sources_for(self, category: str) -> List[str]:
+        key = 'price' if category in PRICE_CATEGORIES else category
+        names = SOURCES_BY_CATEGORY.get(key, SOURCES_BY_CATEGORY['general'])
+        return [name for name in names if name in self.sources]
+
+    def _executor(self, name: str) -> ThreadPoolExecutor:
+        with self._lock:
+            if name not in self._executors:
+                self._executors[name] = ThreadPoolExecutor(max_workers=self.workers_per_source,
+                                                           thread_name_prefix=f'search-{name}')
+            return self._executors[name]
+
+    def _timed(self, name: str, search_query: str, expires_at: float) -> List[Dict]:
+        start = time.perf_counter()
+        remaining = expires_at - start
+        if remaining <= 0:
+            # Queued behind a slow call of the same source until the query gave up on it
+            return []
+        try:
+            results = self.sources[name](search_query, remaining)
+        except Exception:
+            with self._lock:
+                self._errors[name] = self._errors.get(name, 0) + 1
+            raise
+        with self._lock:
+            self._latency.setdefault(name, deque(maxlen=50)).append(time.perf_counter() - start)
+        for result in results:
+            result.setdefault('source', name)
+        return results
+
+    def search(self, search_query: str, category: str = 'general', deadline: float = None) -> List[Dict]:
+        """Queries the category's sources concurrently and merges what finished by the deadline."""
+        deadline = deadline or self.deadline
+        names = self.sources_for(category)
+        expires_at = time.perf_counter() + deadline
+        futures = {name: self._executor(name).submit(self._timed, name, search_query, expires_at) for name in names}
+        done, pending = wait(futures.values(), timeout=deadline)
+
+        per_source = []
+        for name, future in futures.items():
+            if future in pending:
+                with self._lock:
+                    self._timeouts[name] = self._timeouts.get(name, 0) + 1
+                logger.info(f"Search source {name} missed the {deadline}s deadline")
+                continue
+            try:
+                per_source.append(future.result())
+            except Exception as e:
+                logger.warning(f"Search source {name} failed: {e}")
+        return merge_results(per_source)
+
+    def stats(self) -> Dict[str, dict]:
+        """Median latency, timeouts and errors per source."""
+        with self._lock:
+            return {
+                name: {
+                    'median_latency': median(self._latency[name]) if self._latency.get(name) else None,
+                    'timeouts': self._timeouts.get(name, 0),
+                    'errors': self._errors.get(name, 0),
+                }
+                for name in self.sources
+            }
+
+
+# Global instance
+search_fanout = SearchFanout()
+
+
+if __name__ == '__main__':
+    while True:
+        query = input('Search: ')
+        start = time.perf_counter()
+        for result in search_fanout.search(query):
+            print(f"[{result['source']}] {result['title']}\n    {result['body'][:120]}")
+        print(f"{time.perf_counter() - start:.2f}s {search_fanout.stats()}")
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Local Search Index
+Persists every fetched search result in a SQLite FTS5 index so related questions can be answered offline
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+from .SearchCache import CATEGORY_TTLS
+from .SemanticCache import STOPWORDS, TIME_WORDS
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', 'SearchIndex.db')
+SEARCH_INDEX_MAX_AGE = float(os.getenv('SEARCH_INDEX_MAX_AGE', str(7 * 24 * 3600)))  # evicted after this
+SEARCH_INDEX_MIN_HITS = int(os.getenv('SEARCH_INDEX_MIN_HITS', '3'))  # fresh hits needed to skip the web
+# Share of the question's terms a hit must contain to count towards SEARCH_INDEX_MIN_HITS
+SEARCH_INDEX_MIN_COVERAGE = float(os.getenv('SEARCH_INDEX_MIN_COVERAGE', '0.6'))
+
+# Question words that are not terms of the question
+QUESTION_NOISE = STOPWORDS | TIME_WORDS | {'what', 'whats', 'how', 'much', 'who', 'when', 'where', 'which',
+                                           'search', 'find', 'show', 'give', 'get'}
+# Query words that say nothing about the content of a snippet
+QUERY_NOISE = QUESTION_NOISE | {'live', 'price', 'rate'}
+
+WORD = re.compile(r'\w+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT UNIQUE NOT NULL,
+    title TEXT,
+    body TEXT,
+    href TEXT,
+    source TEXT,
+    search_query TEXT,
+    category TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_fetched_at ON documents(fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, body, content='documents', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+END;
+"""
+
+
+def match_expression(query: str) -> Optional[str]:
+    """FTS5 query requiring every content word of the question: 'gold hyderabad' -> '"gold" AND "hyderabad"'."""
+    words = [word for word in WORD.findall(query.lower()) if word not in QUERY_NOISE and len(word) > 1]
+    if not words:
+        return None
+    return ' AND '.join(f'"{word}"' for word in dict.fromkeys(words))
+
+
+def term_coverage(query: str, result: Dict) -> float:
+    """Share of the question's terms ('gold price hyderabad': gold, price, hyderabad) found in a result."""
+    terms = {word for word in WORD.findall(query.lower()) if word not in QUESTION_NOISE and len(word) > 1}
+    if not terms:
+        return 1.0
+    words = set(WORD.findall(f"{result.get('title', '')} {result.get('body', '')}".lower()))
+    return len(terms & words) / len(terms)
+
+
+class SearchIndex:
+    """
+    Titles and snippets of fetched search results with the time they were fetched.
+    Entries older than max_age are evicted; lookups can require a maximum age per category.
+    """
+
+    def __init__(self, path: str = None, max_age: float = None):
+        self.path = path or SEARCH_INDEX_PATH
+        self.max_age = max_age if max_age is not None else SEARCH_INDEX_MAX_AGE
+        self.enabled = os.getenv('SEARCH_INDEX_ENABLED', 'true').lower() != 'false'
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._db = None
+        if self.enabled:
+            try:
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.executescript(SCHEMA)
+                self.evict()
+            except sqlite3.Error as e:
+                # FTS5 missing from this SQLite build, or the file is unusable
+                logger.warning(f"Search index disabled: {e}")
+                self.enabled = False
+
+    def add_results(self, search_query: str, category: str, results: List[Dict]) -> int:
+        """Stores (or refreshes) results fetched for a search query; returns how many were stored."""
+        if not self.enabled or not results:
+            return 0
+
+        now = time.time()
+        rows = []
+        for result in results:
+            title, body, href = result.get('title', ''), result.get('body', ''), result.get('href', '')
+            if not (title or body):
+                continue
+            doc_key = href or hashlib.sha256(f'{title}\0{body}'.encode('utf-8')).hexdigest()
+            rows.append((doc_key, title, body, href, result.get('source', ''), search_query, category, now))
+
+        with self._lock:
+            # Delete-then-insert keeps the FTS table in step through the triggers
+            self._db.executemany("DELETE FROM documents WHERE doc_key = ?", [(row[0],) for row in rows])
+            self._db.executemany(
+                "INSERT INTO documents (doc_key, title, body, href, source, search_query, category, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+            self._inserts += len(rows)
+            evict_now = self._inserts >= 500
+        if evict_now:
+            self.evict()
+        return len(rows)
+
+    def search(self, query: str, max_age: float = None, limit: int = 5) -> List[Dict]:
+        """Best BM25 matches for the question's content words, optionally no older than max_age seconds."""
+        expression = match_expression(query)
+        if not self.enabled or not expression:
+            return []
+
+        oldest = time.time() - (max_age if max_age is not None else self.max_age)
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    "SELECT d.title, d.body, d.href, d.source, d.fetched_at FROM documents_fts "
+                    "JOIN documents d ON d.id = documents_fts.rowid "
+                    "WHERE documents_fts MATCH ? AND d.fetched_at >= ? "
+                    "ORDER BY bm25(documents_fts) LIMIT ?", (expression, oldest, limit)).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Search index query failed: {e}")
+                return []
+
+        return [{'title': title, 'body': body, 'href': href, 'source': 'local', 'origin': source,
+                 'fetched_at': fetched_at} for title, body, href, source, fetched_at in rows]
+
+    def fresh_hits(self, query: str, category: str) -> List[Dict]:
+        """
+        Matches fresh enough for the query category (its search-cache TTL) that contain at least
+        SEARCH_INDEX_MIN_COVERAGE of the question's terms, or an empty list when there are fewer
+        than SEARCH_INDEX_MIN_HITS of them. The FTS match alone would accept "bitcoin mining"
+        for "bitcoin price", since price words are not required to match.
+        """
+        # Extra candidates, as low-coverage documents can outrank the good ones on BM25
+        hits = self.search(query, max_age=CATEGORY_TTLS.get(category, CATEGORY_TTLS['general']), limit=20)
+        hits = [hit for hit in hits if term_coverage(query, hit) >= SEARCH_INDEX_MIN_COVERAGE][:5]
+        if len(hits) >= SEARCH_INDEX_MIN_HITS:
+            self.hits += 1
+            return hits
+        self.misses += 1
+        return []
+
+    def recorded_queries(self, limit: int = 100) -> Dict[str, List[Dict]]:
+        """Stored results grouped by the search query that fetched them, most recent queries first."""
+        if not self.enabled:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT search_query, title, body, href, source FROM documents "
+                "WHERE search_query IN (SELECT search_query FROM documents GROUP BY search_query "
+                "ORDER BY MAX(fetched_at) DESC LIMIT ?) ORDER BY id", (limit,)).fetchall()
+        recorded: Dict[str, List[Dict]] = {}
+        for search_query, title, body, href, source in rows:
+            recorded.setdefault(search_query, []).append({'title': title, 'body': body, 'href': href, 'source': source})
+        return recorded
+
+    def evict(self, max_age: float = None) -> int:
+        """Deletes entries older than max_age seconds; returns how many were removed."""
+        if not self.enabled:
+            return 0
+        oldest = time.time() - (max_age if max_age is not None else self.max_age)
+        with self._lock:
+            removed = self._db.execute("DELETE FROM documents WHERE fetched_at < ?", (oldest,)).rowcount
+            self._db.commit()
+            self._inserts = 0
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Row count, database size on disk and lookup counters."""
+        if not self.enabled:
+            return {'enabled': False}
+        with self._lock:
+            rows, oldest = self._db.execute("SELECT COUNT(*), MIN(fetched_at) FROM documents").fetchone()
+            page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            'rows': rows,
+            'bytes': page_count * page_size,
+            'oldest_age': time.time() - oldest if oldest else None,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+# Global instance
+search_index = SearchIndex()
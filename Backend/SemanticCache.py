@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Semantic Answer Cache
+Serves stored answers for near-duplicate general questions using a local embedding
+"""
+
+import os
+import re
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Contractions and abbreviations expanded before embedding so that
+# "what's AI" and "what is artificial intelligence" normalize to the same words
+CONTRACTIONS = {
+    "what's": 'what is', "who's": 'who is', "where's": 'where is', "how's": 'how is',
+    "when's": 'when is', "why's": 'why is', "it's": 'it is', "that's": 'that is',
+    "there's": 'there is', "can't": 'cannot', "don't": 'do not', "doesn't": 'does not',
+    "isn't": 'is not', "aren't": 'are not', "i'm": 'i am', "you're": 'you are',
+}
+
+ABBREVIATIONS = {
+    'ai': 'artificial intelligence',
+    'ml': 'machine learning',
+    'dl': 'deep learning',
+    'nlp': 'natural language processing',
+    'llm': 'large language model',
+    'cpu': 'central processing unit',
+    'gpu': 'graphics processing unit',
+    'os': 'operating system',
+    'www': 'world wide web',
+    'iot': 'internet of things',
+}
+
+# Words carrying no meaning for similarity purposes
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'of', 'to', 'in', 'on', 'for',
+    'me', 'please', 'can', 'you', 'tell', 'explain', 'about', 'do', 'does', 'i', 'my',
+    'jarvis', 'hey', 'so', 'just', 'could', 'would', 'kindly',
+}
+
+# Pronouns referring back to the conversation and follow-up markers. Demonstratives ('that',
+# 'this') only count in phrases or at the end of the query, since "what is that" is a follow-up
+# but "the book that won" is not.
+CONTEXT_WORDS = {
+    'it', "it's", 'its', 'he', 'she', 'him', 'her', 'his', 'they', 'them', 'their',
+    'again', 'previous', 'instead',
+}
+CONTEXT_PHRASES = [
+    'that one', 'this one', 'the same', 'the last one', 'the above', 'what about', 'how about',
+    'tell me more', 'more about that', 'another one', 'another example', 'you said', 'you just said',
+    'as before',
+]
+TRAILING_CONTEXT_WORDS = {'that', 'this', 'those', 'these', 'there', 'else'}
+
+# Words that make the answer depend on the current time
+TIME_WORDS = {'today', 'now', 'time', 'date', 'day', 'tomorrow', 'yesterday', 'current', 'latest'}
+
+EMBEDDING_DIM = 512
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases the query, expands contractions and abbreviations and strips punctuation."""
+    text = query.lower().strip()
+    for contraction, expansion in CONTRACTIONS.items():
+        text = text.replace(contraction, expansion)
+    words = re.findall(r"[a-z0-9]+", text)
+    expanded = []
+    for word in words:
+        expanded.extend(ABBREVIATIONS.get(word, word).split())
+    return ' '.join(expanded)
+
+
+def embed(text: str) -> Dict[int, float]:
+    """
+    Embeds normalized text into a sparse, L2-normalized vector of hashed
+    content words and character trigrams.
+    """
+    vector: Dict[int, float] = {}
+    words = [word for word in text.split() if word not in STOPWORDS]
+
+    def add(feature: str, weight: float):
+        bucket = int(hashlib.md5(feature.encode('utf-8')).hexdigest()[:8], 16) % EMBEDDING_DIM
+        vector[bucket] = vector.get(bucket, 0.0) + weight
+
+    for word in words:
+        add(f'w:{word}', 1.0)
+        padded = f' {word} '
+        for i in range(len(padded) - 2):
+            add(f'c:{padded[i:i + 3]}', 0.3)
+
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if norm:
+        vector = {bucket: value / norm for bucket, value in vector.items()}
+    return vector
+
+
+def cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(bucket, 0.0) for bucket, value in a.items())
+
+
+class SemanticCache:
+    """
+    Caches answers to general queries and serves them for near-duplicate questions.
+    Entries expire after a TTL and the least recently used entry is evicted when full.
+    """
+
+    def __init__(self, threshold: float = None, ttl: float = None, max_entries: int = None):
+        self.threshold = threshold if threshold is not None else float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.85'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('SEMANTIC_CACHE_TTL', '3600'))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '256'))
+        self.enabled = os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() != 'false'
+
+        # normalized query -> (embedding, answer, stored_at)
+        self._entries: "OrderedDict[str, Tuple[Dict[int, float], str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def is_context_dependent(self, query: str, history: Optional[List[Dict]] = None) -> bool:
+        """
+        Returns True when the meaning of the query depends on the recent conversation
+        or on the current time, in which case the cache must be bypassed.
+        """
+        tokens = re.findall(r"[a-z']+", query.lower())
+        words = set(tokens)
+        if words & CONTEXT_WORDS or words & TIME_WORDS:
+            return True
+        text = f" {' '.join(tokens)} "
+        if any(f" {phrase} " in text for phrase in CONTEXT_PHRASES):
+            return True
+        if tokens and tokens[-1] in TRAILING_CONTEXT_WORDS:
+            return True
+
+        # Very short follow-ups ("and python?") only make sense with the previous turn
+        content_words = [word for word in normalize_query(query).split() if word not in STOPWORDS]
+        if len(content_words) < 2 and history:
+            return True
+
+        return False
+
+    def get(self, query: str, history: Optional[List[Dict]] = None) -> Optional[str]:
+        """Returns a cached answer for a near-duplicate query, or None."""
+        if not self.enabled or self.is_context_dependent(query, history):
+            return None
+
+        normalized = normalize_query(query)
+        vector = embed(normalized)
+        if not vector:
+            return None
+
+        now = time.time()
+        best_key, best_score = None, 0.0
+        with self._lock:
+            for key, (entry_vector, _, stored_at) in list(self._entries.items()):
+                if now - stored_at > self.ttl:
+                    del self._entries[key]
+                    continue
+                score = cosine_similarity(vector, entry_vector)
+                if score > best_score:
+                    best_key, best_score = key, score
+
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                self.hits += 1
+                logger.info(f"Semantic cache hit ({best_score:.2f}) for '{query}' -> '{best_key}'")
+                return self._entries[best_key][1]
+
+        self.misses += 1
+        return None
+
+    def put(self, query: str, answer: str, history: Optional[List[Dict]] = None) -> None:
+        """Stores the answer for a query unless the query depends on context."""
+        if not self.enabled or not answer or self.is_context_dependent(query, history):
+            return
+
+        normalized = normalize_query(query)
+        vector = embed(normalized)
+        if not vector:
+            return
+
+        with self._lock:
+            self._entries[normalized] = (vector, answer, time.time())
+            self._entries.move_to_end(normalized)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all cached answers."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters and the number of cached entries."""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+# Global instance
+semantic_cache = SemanticCache()
+
+if __name__ == "__main__":
+    cache = SemanticCache()
+    cache.put("What is AI?", "AI is the simulation of human intelligence by machines.")
+    for question in ["what's artificial intelligence", "What is AI", "Why is it popular?", "What is Python?"]:
+        start = time.perf_counter()
+        answer = cache.get(question)
+        print(f"{question!r}: {answer!r} ({(time.perf_counter() - start) * 1000:.2f} ms)")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Snippet Ranking
+Scores search snippets against the question with BM25, drops near-duplicates and keeps
+the best passages within a token budget for the realtime prompt
+"""
+
+import os
+import re
+import math
+import argparse
+from collections import Counter
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+from .SemanticCache import STOPWORDS
+from .SearchFanout import shingles, jaccard
+
+# Load environment variables
+load_dotenv()
+
+REALTIME_CONTEXT_TOKENS = int(os.getenv('REALTIME_CONTEXT_TOKENS', '200'))
+PASSAGE_DUPLICATE_THRESHOLD = float(os.getenv('PASSAGE_DUPLICATE_THRESHOLD', '0.5'))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 0.3  # a matching title lifts every passage of its result a little
+MIN_RELATIVE_SCORE = 0.25  # passages scoring below this fraction of the best one are dropped
+
+WORD = re.compile(r'\w+')
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token for English)."""
+    return max(1, round(len(text) / 4))
+
+
+def split_passages(results: List[Dict]) -> List[Tuple[str, str]]:
+    """Breaks each result body into sentence passages, returned as (title, passage)."""
+    passages = []
+    for result in results:
+        title = result.get('title', '').strip()
+        for sentence in SENTENCE_BOUNDARY.split(result.get('body', '').strip()):
+            sentence = sentence.strip()
+            if len(sentence) >= 20:
+                passages.append((title, sentence))
+    return passages
+
+
+def bm25_scores(query: str, documents: List[str]) -> List[float]:
+    """BM25 score of every document for the query, with IDF taken from the documents themselves."""
+    query_terms = set(tokenize(query))
+    tokenized = [tokenize(document) for document in documents]
+    if not tokenized or not query_terms:
+        return [0.0] * len(documents)
+
+    average_length = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1.0
+    document_frequency = Counter(term for tokens in tokenized for term in set(tokens) & query_terms)
+    count = len(tokenized)
+
+    scores = []
+    for tokens in tokenized:
+        frequencies = Counter(tokens)
+        score = 0.0
+        for term in query_terms:
+            frequency = frequencies.get(term, 0)
+            if not frequency:
+                continue
+            idf = math.log(1 + (count - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            score += idf * frequency * (BM25_K1 + 1) / (
+                frequency + BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / average_length))
+        scores.append(score)
+    return scores
+
+
+def rank_passages(query: str, results: List[Dict], budget: int = None,
+                  threshold: float = None) -> List[Tuple[str, str, float]]:
+    """
+    Best passages for the query, best first, as (title, passage, score). Weak matches and
+    near-duplicates of a better passage are dropped and selection stops at the token budget.
+    """
+    budget = budget or REALTIME_CONTEXT_TOKENS
+    threshold = threshold if threshold is not None else PASSAGE_DUPLICATE_THRESHOLD
+
+    passages = split_passages(results)
+    passage_scores = bm25_scores(query, [passage for _, passage in passages])
+    title_scores = bm25_scores(query, [title for title, _ in passages])
+    scores = [score + TITLE_WEIGHT * title_score for score, title_score in zip(passage_scores, title_scores)]
+    ranked = sorted(zip(passages, scores), key=lambda item: item[1], reverse=True)
+
+    # Without any match, fall back to the search engine's own order
+    if ranked and ranked[0][1] > 0:
+        ranked = [item for item in ranked if item[1] >= MIN_RELATIVE_SCORE * ranked[0][1]]
+    else:
+        ranked = list(zip(passages, scores))
+
+    selected, kept_shingles, used = [], [], 0
+    for (title, passage), score in ranked:
+        content = shingles(passage)
+        if any(jaccard(content, other) >= threshold for other in kept_shingles):
+            continue
+        cost = estimate_tokens(passage)
+        if used + cost > budget:
+            if selected:
+                continue
+            # Always keep the best passage, trimmed to the budget
+            passage = passage[:budget * 4]
+            cost = budget
+        selected.append((title, passage, score))
+        kept_shingles.append(content)
+        used += cost
+    return selected
+
+
+def build_context(query: str, results: List[Dict], budget: int = None) -> str:
+    """The ranked passages formatted for the realtime system message, grouped under their titles."""
+    passages = rank_passages(query, results, budget)
+    if not passages:
+        return f"No relevant search results were found for '{query}'."
+
+    grouped: Dict[str, List[str]] = {}
+    for title, passage, _ in passages:
+        grouped.setdefault(title, []).append(passage)
+    lines = [f"Search results for '{query}' (most relevant first):"]
+    lines += [f"- {title}: {' '.join(texts)}" if title else f"- {' '.join(texts)}" for title, texts in grouped.items()]
+    return '\n'.join(lines)
+
+
+def unranked_context(query: str, results: List[Dict]) -> str:
+    """The full result list as GoogleSearch formats it, for size comparisons."""
+    answer = f"Search results for '{query}':\n\n"
+    for i, result in enumerate(results, 1):
+        body = result.get('body', 'No description')
+        answer += f"{i}. {result.get('title', 'No title')}\n   {body[:200]}{'...' if len(body) > 200 else ''}\n\n"
+    return answer
+
+
+if __name__ == '__main__':
+    from .SearchIndex import SearchIndex
+
+    parser = argparse.ArgumentParser(description='Prompt size before and after snippet ranking on recorded queries')
+    parser.add_argument('--index', default=None, help='search index with the recorded queries (default SEARCH_INDEX_PATH)')
+    parser.add_argument('--budget', type=int, default=REALTIME_CONTEXT_TOKENS)
+    args = parser.parse_args()
+
+    recorded = SearchIndex(args.index, max_age=float('inf')).recorded_queries()
+    if not recorded:
+        print("No recorded queries in the search index yet; ask a few realtime questions first.")
+
+    before_total = after_total = 0
+    for search_query, results in recorded.items():
+        before = estimate_tokens(unranked_context(search_query, results))
+        after = estimate_tokens(build_context(search_query, results, args.budget))
+        before_total += before
+        after_total += after
+        print(f"{before:>5} -> {after:>5} tokens  {search_query}")
+    if recorded:
+        print(f"Total {before_total} -> {after_total} tokens ({100 * (1 - after_total / before_total):.0f}% smaller)")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Pluggable Speech Backends
+Cloud (edge-tts) and local (espeak-ng, piper) synthesis engines with latency-based selection
+"""
+
+import os
+import time
+import shutil
+import asyncio
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from statistics import median
+from typing import Deque, Dict, List, Optional
+import edge_tts
+from dotenv import load_dotenv
+
+from .Replay import replayable
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 'auto' selects by latency and availability; a backend name pins it (others stay as fallbacks)
+TTS_BACKEND = os.getenv('TTS_BACKEND', 'auto').lower()
+TTS_SHORT_TEXT_CHARS = int(os.getenv('TTS_SHORT_TEXT_CHARS', '60'))
+TTS_LATENCY_BUDGET = float(os.getenv('TTS_LATENCY_BUDGET', '1.5'))  # seconds a long answer may take on the preferred engine
+TTS_BACKEND_RETRY_AFTER = float(os.getenv('TTS_BACKEND_RETRY_AFTER', '30'))  # seconds a failed backend is skipped
+
+ESPEAK_VOICE = os.getenv('ESPEAK_VOICE', 'en-us')
+ESPEAK_SPEED = os.getenv('ESPEAK_SPEED', '195')  # words per minute, close to edge-tts at +22%
+PIPER_MODEL = os.getenv('PIPER_MODEL', '')
+PIPER_LENGTH_SCALE = os.getenv('PIPER_LENGTH_SCALE', '0.85')
+
+
+class SpeechBackend(ABC):
+    """A synthesis engine turning text into an audio buffer pygame can decode."""
+
+    name = ''
+    local = False
+
+    @abstractmethod
+    def available(self) -> bool:
+        """Whether the engine is installed and configured."""
+
+    @abstractmethod
+    def voice_key(self) -> str:
+        """Identifies the voice in speech cache keys."""
+
+    @abstractmethod
+    async def synthesize(self, text: str, pitch: str, rate: str) -> bytes:
+        """Audio for the text at the given pitch and rate."""
+
+
+class EdgeBackend(SpeechBackend):
+    """Microsoft Edge neural voices over the network (MP3)."""
+
+    name = 'edge'
+
+    def available(self) -> bool:
+        return bool(os.environ.get('AssistantVoice'))
+
+    def voice_key(self) -> str:
+        # Plain voice name so entries cached before backends existed stay valid
+        return os.environ.get('AssistantVoice', '')
+
+    @replayable('edge', lambda self, text, pitch, rate: {'voice': os.environ.get('AssistantVoice'), 'text': text,
+                                                        'pitch': pitch, 'rate': rate})
+    async def synthesize(self, text: str, pitch: str, rate: str) -> bytes:
+        communicate = edge_tts.Communicate(text, os.environ['AssistantVoice'], pitch=pitch, rate=rate)
+        chunks = []
+        async for chunk in communicate.stream():
+            if chunk['type'] == 'audio':
+                chunks.append(chunk['data'])
+        return b''.join(chunks)
+
+
+class EspeakBackend(SpeechBackend):
+    """espeak-ng (or espeak) run as a subprocess writing WAV to stdout. Fully offline."""
+
+    name = 'espeak'
+    local = True
+
+    def __init__(self):
+        self.executable = shutil.which('espeak-ng') or shutil.which('espeak')
+
+    def available(self) -> bool:
+        return self.executable is not None
+
+    def voice_key(self) -> str:
+        return f'espeak:{ESPEAK_VOICE}:{ESPEAK_SPEED}'
+
+    async def synthesize(self, text: str, pitch: str, rate: str) -> bytes:
+        process = await asyncio.create_subprocess_exec(
+            self.executable, '--stdout', '-v', ESPEAK_VOICE, '-s', ESPEAK_SPEED, text,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0 or not stdout:
+            raise RuntimeError(f"espeak failed: {stderr.decode(errors='ignore').strip()}")
+        return stdout
+
+
+class PiperBackend(SpeechBackend):
+    """piper neural voices run locally as a subprocess (WAV). Needs PIPER_MODEL."""
+
+    name = 'piper'
+    local = True
+
+    def __init__(self):
+        self.executable = shutil.which('piper')
+
+    def available(self) -> bool:
+        return self.executable is not None and os.path.exists(PIPER_MODEL)
+
+    def voice_key(self) -> str:
+        return f'piper:{os.path.basename(PIPER_MODEL)}:{PIPER_LENGTH_SCALE}'
+
+    async def synthesize(self, text: str, pitch: str, rate: str) -> bytes:
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.executable, '--model', PIPER_MODEL, '--length_scale', PIPER_LENGTH_SCALE,
+                '--output_file', path,
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+            _, stderr = await process.communicate(text.encode('utf-8'))
+            if process.returncode != 0:
+                raise RuntimeError(f"piper failed: {stderr.decode(errors='ignore').strip()}")
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+
+class BackendSelector:
+    """
+    Orders available backends per utterance. Short confirmations go to whichever engine has
+    been fastest for short texts; long answers stay on the first preferred engine (the cloud
+    voice) unless it is failing or its recent latency exceeds TTS_LATENCY_BUDGET.
+    """
+
+    def __init__(self, backends: List[SpeechBackend] = None, preference: str = None,
+                 short_chars: int = None, latency_budget: float = None, window: int = 20):
+        self.backends = backends if backends is not None else [EdgeBackend(), PiperBackend(), EspeakBackend()]
+        self.preference = preference or TTS_BACKEND
+        self.short_chars = short_chars or TTS_SHORT_TEXT_CHARS
+        self.latency_budget = latency_budget if latency_budget is not None else TTS_LATENCY_BUDGET
+
+        self._latency: Dict[tuple, Deque[float]] = {}  # (backend, 'short' | 'long') -> seconds
+        self._failed_at: Dict[str, float] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def _bucket(self, text: str) -> str:
+        return 'short' if len(text) <= self.short_chars else 'long'
+
+    def _median(self, backend: SpeechBackend, bucket: str) -> Optional[float]:
+        samples = self._latency.get((backend.name, bucket))
+        return median(samples) if samples else None
+
+    def usable(self) -> List[SpeechBackend]:
+        """Backends that are installed/configured and not in their post-failure back-off."""
+        now = time.time()
+        return [backend for backend in self.backends
+                if backend.available() and now - self._failed_at.get(backend.name, 0) > TTS_BACKEND_RETRY_AFTER]
+
+    def order(self, text: str) -> List[SpeechBackend]:
+        """Returns the backends to try for the text, best first."""
+        candidates = self.usable()
+        if not candidates:
+            # Everything is backing off: retry all rather than going silent
+            candidates = [backend for backend in self.backends if backend.available()]
+
+        pinned = [backend for backend in candidates if backend.name == self.preference]
+        if pinned:
+            return pinned + [backend for backend in candidates if backend is not pinned[0]]
+
+        bucket = self._bucket(text)
+        with self._lock:
+            if bucket == 'long':
+                preferred = candidates[0] if candidates else None
+                latency = self._median(preferred, bucket) if preferred else None
+                if latency is None or latency <= self.latency_budget:
+                    return candidates
+
+            # Fastest measured first; unmeasured local engines before unmeasured cloud ones
+            def rank(backend: SpeechBackend):
+                latency = self._median(backend, bucket)
+                return (latency is None, latency if latency is not None else 0.0, not backend.local)
+
+            return sorted(candidates, key=rank)
+
+    def record(self, backend: SpeechBackend, text: str, seconds: float) -> None:
+        """Records a successful synthesis."""
+        with self._lock:
+            key = (backend.name, self._bucket(text))
+            self._latency.setdefault(key, deque(maxlen=self._window)).append(seconds)
+            self._failed_at.pop(backend.name, None)
+
+    def record_failure(self, backend: SpeechBackend) -> None:
+        """Skips the backend for TTS_BACKEND_RETRY_AFTER seconds."""
+        with self._lock:
+            self._failed_at[backend.name] = time.time()
+
+    def stats(self) -> Dict[str, dict]:
+        """Median latency per backend and text length class, with availability."""
+        with self._lock:
+            return {
+                backend.name: {
+                    'available': backend.available(),
+                    'short': self._median(backend, 'short'),
+                    'long': self._median(backend, 'long'),
+                    'failed_at': self._failed_at.get(backend.name),
+                }
+                for backend in self.backends
+            }
+
+
+# Global instance
+speech_selector = BackendSelector()
+
+
+if __name__ == '__main__':
+    async def demo():
+        for text in ['Done.', 'This is a longer answer that would normally go to the cloud voice because it is long.']:
+            for backend in speech_selector.order(text):
+                start = time.perf_counter()
+                try:
+                    data = await backend.synthesize(text, '+5Hz', '+22%')
+                except Exception as e:
+                    print(f"{backend.name}: failed ({e})")
+                    speech_selector.record_failure(backend)
+                    continue
+                elapsed = time.perf_counter() - start
+                speech_selector.record(backend, text, elapsed)
+                print(f"{backend.name}: {len(data)} bytes in {elapsed:.3f}s")
+        print(speech_selector.stats())
+
+    asyncio.run(demo())
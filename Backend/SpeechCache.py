@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Speech Cache
+Stores synthesized audio keyed by hash(text, voice, pitch, rate) with LRU eviction by total bytes
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def speech_key(text: str, voice: str, pitch: str, rate: str) -> str:
+    """Content address of an utterance."""
+    payload = '\0'.join([text.strip(), voice, pitch, rate])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SpeechCache:
+    """
+    Disk-backed cache of synthesized audio. An in-memory index keeps entries in LRU
+    order and evicts the least recently used files once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        self.directory = directory or os.getenv('SPEECH_CACHE_DIR', 'SpeechCache')
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('SPEECH_CACHE_MAX_BYTES', str(100 * 1024 * 1024)))
+        self.enabled = os.getenv('SPEECH_CACHE_ENABLED', 'true').lower() != 'false'
+
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size in bytes
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.mp3')
+
+    def _load_index(self) -> None:
+        """Rebuilds the LRU index from the files on disk, oldest access first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.mp3'):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, text: str, voice: str, pitch: str, rate: str) -> Optional[bytes]:
+        """Returns cached audio for the utterance, or None."""
+        if not self.enabled:
+            return None
+
+        key = speech_key(text, voice, pitch, rate)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self._total_bytes -= self._index.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, text: str, voice: str, pitch: str, rate: str, data: bytes) -> None:
+        """Stores synthesized audio for the utterance."""
+        if not self.enabled or not data or len(data) > self.max_bytes:
+            return
+
+        key = speech_key(text, voice, pitch, rate)
+        path = self._path(key)
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write speech cache entry: {e}")
+            return
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def contains(self, text: str, voice: str, pitch: str, rate: str) -> bool:
+        """Checks for an entry without touching its LRU position."""
+        key = speech_key(text, voice, pitch, rate)
+        with self._lock:
+            return key in self._index
+
+    def stats(self) -> Dict[str, int]:
+        """Returns entry count, total size and hit/miss counters."""
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Global instance
+speech_cache = SpeechCache()
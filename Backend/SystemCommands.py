@@ -1,7 +1,10 @@
 import subprocess
 import time
 import msvcrt
-from Backend.TTS import print_slow_and_speak, TTS
+from Backend.TTS import print_slow_and_speak, TTS, RegisterFrequentPhrases
+from Backend.ConnectionPool import get_session
+from Backend.Prefetch import prefetcher
+from Backend.Replay import replayable
 import psutil
 import imaplib
 import email
@@ -13,12 +16,28 @@ from tkinter import scrolledtext, messagebox
 import geopy.geocoders
 from geopy.distance import great_circle
 import geocoder
-import requests
 import threading
 
 # Load environment variables
 load_dotenv()
 
+# Fixed lines spoken by the helpers below, pre-synthesized at startup
+RegisterFrequentPhrases([
+    "Battery information is not available. This might be a desktop computer.",
+    "Shutting down now.",
+    "Shutdown cancelled.",
+    "No input received. Shutting down automatically.",
+    "Restarting now.",
+    "Restart cancelled.",
+    "No input received. Restarting automatically.",
+    "Email credentials not found in environment variables.",
+    "No emails found in your inbox.",
+    "Please tell me your destination city or address.",
+    "No destination provided.",
+    "Unable to determine your current location.",
+    "Weather API key not found. Please add OPENWEATHER_API_KEY to your .env file.",
+])
+
 def check_battery_status():
     """Reports the current battery percentage and charging status of the laptop."""
     try:
@@ -83,86 +102,88 @@ def restart_laptop():
     subprocess.run(["shutdown", "/r", "/t", "0"])
     return "Auto-restarting the laptop."
 
-def read_recent_emails():
-    """Reads and speaks recent emails from Gmail inbox."""
-    try:
-        # Get credentials from environment
-        email_user = os.getenv('EMAIL')
-        email_password = os.getenv('EMAIL_APP_PASSWORD')
-
-        if not email_user or not email_password:
-            error_msg = "Email credentials not found in environment variables."
-            print(error_msg)
-            TTS(error_msg)
-            return error_msg
-
-        # Connect to Gmail IMAP
-        mail = imaplib.IMAP4_SSL('imap.gmail.com')
-        mail.login(email_user, email_password)
-        mail.select('inbox')
-
-        # Search for recent emails (last 2)
-        status, messages = mail.search(None, 'ALL')
-        email_ids = messages[0].split()
-
-        if not email_ids:
-            message = "No emails found in your inbox."
-            print(message)
-            TTS(message)
-            return message
-
-        # Get the last 2 emails
-        recent_ids = email_ids[-2:] if len(email_ids) >= 2 else email_ids
-
-        emails_info = []
-        for email_id in reversed(recent_ids):  # Most recent first
-            # Fetch the email
-            status, msg_data = mail.fetch(email_id, '(RFC822)')
-            raw_email = msg_data[0][1]
-
-            # Parse the email
-            email_message = email.message_from_bytes(raw_email)
-
-            # Extract sender, subject, and body preview
-            sender = email_message['From']
-            subject = email_message['Subject'] or 'No Subject'
-
-            # Get body preview
-            body = ""
-            if email_message.is_multipart():
-                for part in email_message.walk():
-                    if part.get_content_type() == "text/plain":
-                        body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        break
-            else:
-                body = email_message.get_payload(decode=True).decode('utf-8', errors='ignore')
-
-            # Clean up body (remove newlines, limit length)
-            body_preview = body.replace('\n', ' ').replace('\r', ' ').strip()
-            if len(body_preview) > 100:
-                body_preview = body_preview[:100] + "..."
-
-            email_info = f"From: {sender}\nSubject: {subject}\nPreview: {body_preview}"
-            emails_info.append(email_info)
-
-        # Close the connection
-        mail.logout()
+@replayable('imap')
+def fetch_recent_emails():
+    """Fetches the two most recent emails from the Gmail inbox and formats them for speaking."""
+    # Get credentials from environment
+    email_user = os.getenv('EMAIL')
+    email_password = os.getenv('EMAIL_APP_PASSWORD')
+
+    if not email_user or not email_password:
+        raise ValueError("Email credentials not found in environment variables.")
 
-        # Format and speak the results
-        if emails_info:
-            full_message = f"I found {len(emails_info)} recent email(s):\n\n"
-            for i, info in enumerate(emails_info, 1):
-                full_message += f"Email {i}:\n{info}\n\n"
+    # Connect to Gmail IMAP
+    mail = imaplib.IMAP4_SSL('imap.gmail.com')
+    mail.login(email_user, email_password)
+    mail.select('inbox')
 
-            print(full_message)
-            TTS(full_message)
-            return full_message
+    # Search for recent emails (last 2)
+    status, messages = mail.search(None, 'ALL')
+    email_ids = messages[0].split()
+
+    if not email_ids:
+        mail.logout()
+        return "No emails found in your inbox."
+
+    # Get the last 2 emails
+    recent_ids = email_ids[-2:] if len(email_ids) >= 2 else email_ids
+
+    emails_info = []
+    for email_id in reversed(recent_ids):  # Most recent first
+        # Fetch the email
+        status, msg_data = mail.fetch(email_id, '(RFC822)')
+        raw_email = msg_data[0][1]
+
+        # Parse the email
+        email_message = email.message_from_bytes(raw_email)
+
+        # Extract sender, subject, and body preview
+        sender = email_message['From']
+        subject = email_message['Subject'] or 'No Subject'
+
+        # Get body preview
+        body = ""
+        if email_message.is_multipart():
+            for part in email_message.walk():
+                if part.get_content_type() == "text/plain":
+                    body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
+                    break
         else:
-            message = "No emails could be read."
-            print(message)
-            TTS(message)
-            return message
+            body = email_message.get_payload(decode=True).decode('utf-8', errors='ignore')
+
+        # Clean up body (remove newlines, limit length)
+        body_preview = body.replace('\n', ' ').replace('\r', ' ').strip()
+        if len(body_preview) > 100:
+            body_preview = body_preview[:100] + "..."
+
+        email_info = f"From: {sender}\nSubject: {subject}\nPreview: {body_preview}"
+        emails_info.append(email_info)
+
+    # Close the connection
+    mail.logout()
+
+    # Format the results
+    if not emails_info:
+        return "No emails could be read."
+    full_message = f"I found {len(emails_info)} recent email(s):\n\n"
+    for i, info in enumerate(emails_info, 1):
+        full_message += f"Email {i}:\n{info}\n\n"
+    return full_message
+
+def read_recent_emails():
+    """Reads and speaks recent emails from Gmail inbox."""
+    try:
+        # Answered instantly when the inbox was prefetched shortly before
+        message = prefetcher.consume('email') or fetch_recent_emails()
+        print(message)
+        TTS(message)
+        return message
 
+    except ValueError as e:
+        error_msg = str(e)
+        print(error_msg)
+        TTS(error_msg)
+        return error_msg
     except Exception as e:
         error_msg = f"Error reading emails: {str(e)}"
         print(error_msg)
@@ -298,6 +319,41 @@ def get_location_info():
         print_slow_and_speak(error_msg)
         return error_msg
 
+@replayable('geocoder')
+def current_city():
+    """City of the current location from the IP address, London when it cannot be detected."""
+    current_location = geocoder.ip('me')
+    return current_location.city if current_location.ok else "London"
+
+@replayable('openweather')
+def fetch_weather(city=None):
+    """Fetches the weather for a city (default: current location); returns (city, report)."""
+    api_key = os.getenv('OPENWEATHER_API_KEY')
+    if not api_key:
+        raise ValueError("Weather API key not found. Please add OPENWEATHER_API_KEY to your .env file.")
+    city = city or current_city()
+
+    # API call
+    url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
+    response = get_session().get(url, timeout=10)
+    data = response.json()
+
+    if response.status_code != 200:
+        raise ValueError(f"Error getting weather data: {data.get('message', 'Unknown error')}")
+
+    # Extract weather info
+    weather_desc = data['weather'][0]['description']
+    temp = data['main']['temp']
+    feels_like = data['main']['feels_like']
+    humidity = data['main']['humidity']
+    wind_speed = data['wind']['speed']
+
+    # Format result
+    result = f"Weather in {city}: {weather_desc.capitalize()}.\n"
+    result += f"Temperature: {temp}°C (feels like {feels_like}°C).\n"
+    result += f"Humidity: {humidity}%, Wind speed: {wind_speed} m/s."
+    return city, result
+
 def get_weather():
     """Get weather information for current location or specified city"""
     try:
@@ -307,12 +363,9 @@ def get_weather():
             print_slow_and_speak("Weather API key not found. Please add OPENWEATHER_API_KEY to your .env file.")
             return
 
-        # Get current location
-        current_location = geocoder.ip('me')
-        if not current_location.ok:
-            default_city = "London"  # fallback
-        else:
-            default_city = current_location.city
+        # A prefetched report for the current location also saves the location lookup
+        prefetched = prefetcher.consume('weather')
+        default_city = prefetched[0] if prefetched else current_city()
 
         print_slow_and_speak(f"Current location detected as {default_city}. Press Enter to use this location, or type a different city name.")
 
@@ -320,31 +373,22 @@ def get_weather():
         user_input = input("Enter city (or press Enter for current location): ").strip()
         city = user_input if user_input else default_city
 
-        # API call
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        response = requests.get(url)
-        data = response.json()
-
-        if response.status_code != 200:
-            print_slow_and_speak(f"Error getting weather data: {data.get('message', 'Unknown error')}")
-            return
-
-        # Extract weather info
-        weather_desc = data['weather'][0]['description']
-        temp = data['main']['temp']
-        feels_like = data['main']['feels_like']
-        humidity = data['main']['humidity']
-        wind_speed = data['wind']['speed']
-
-        # Format result
-        result = f"Weather in {city}: {weather_desc.capitalize()}.\n"
-        result += f"Temperature: {temp}°C (feels like {feels_like}°C).\n"
-        result += f"Humidity: {humidity}%, Wind speed: {wind_speed} m/s."
+        if prefetched and city == default_city:
+            result = prefetched[1]
+        else:
+            _, result = fetch_weather(city)
 
         print_slow_and_speak(result)
         return result
 
+    except ValueError as e:
+        print_slow_and_speak(str(e))
+        return
     except Exception as e:
         error_msg = f"Error getting weather information: {str(e)}"
         print_slow_and_speak(error_msg)
-        return error_msg
\ No newline at end of file
+        return error_msg
+
+# Weather and inbox checks are routine enough to fetch ahead of time
+prefetcher.register_fetcher('weather', fetch_weather, float(os.getenv('PREFETCH_WEATHER_TTL', '1800')))
+prefetcher.register_fetcher('email', fetch_recent_emails, float(os.getenv('PREFETCH_EMAIL_TTL', '300')))
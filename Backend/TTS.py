@@ -1,49 +1,355 @@
-import pygame
 import random
-import asyncio
-import edge_tts
 import os
+import re
+import time
+import logging
+import queue
+import threading
+from collections import deque
+from typing import List, Optional
 from dotenv import load_dotenv
 
+from .SpeechCache import speech_cache
+from .SpeechBackends import speech_selector
+from .EventLoop import run_coroutine, submit
+from .AudioPlayer import audio_player, PRIORITY_SPEECH
+
 # Load environment variables
 load_dotenv()
 
-async def TextToAudioFile(text: str) -> None:
-    """Converts text to an audio file."""
-    file_path = 'data.mp3'
+logger = logging.getLogger(__name__)
+
+# Voice settings
+VOICE_PITCH = '+5Hz'
+VOICE_RATE = '+22%'
+
+# Sentence streaming: synthesize sentence N+1 while sentence N plays
+TTS_STREAMING = os.getenv('TTS_STREAMING', 'false').lower() == 'true'
+TTS_PIPELINE_DEPTH = int(os.getenv('TTS_PIPELINE_DEPTH', '2'))
+PLAYBACK_MARGIN = float(os.getenv('TTS_PLAYBACK_MARGIN', '5'))  # seconds allowed beyond the clip length
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?।])\s+')
+MIN_SENTENCE_CHARS = 20
+
+# Spoken instead of the rest of a long answer
+CHAT_SCREEN_RESPONSES = [
+    'The rest of the result has been printed to the chat screen, kindly check it out.',
+    'You can see the rest of the text on the chat screen.',
+    'The remaining part of the text is now on the chat screen.',
+    "You'll find more text on the chat screen.",
+    'Please check the chat screen for additional text.'
+]
+
+# Pre-synthesized into the speech cache at startup
+FREQUENT_PHRASES = ["Welcome to JARVIS. How can I help you?"] + CHAT_SCREEN_RESPONSES
+
+# Time from TextToSpeech call to audio start, per mode
+tts_metrics = {
+    'whole': deque(maxlen=50),
+    'streaming': deque(maxlen=50)
+}
+
+def split_sentences(text: str) -> List[str]:
+    """Splits text into sentences, merging fragments too short to be worth a request."""
+    sentences = []
+    for part in SENTENCE_BOUNDARY.split(text.strip()):
+        part = part.strip()
+        if not part:
+            continue
+        if sentences and len(sentences[-1]) < MIN_SENTENCE_CHARS:
+            sentences[-1] += ' ' + part
+        else:
+            sentences.append(part)
+    return sentences
+
+async def TextToAudioBytes(text: str) -> bytes:
+    """
+    Synthesizes text to audio bytes on the backend chosen by speech_selector, falling back to
+    the next backend on failure. Repeated utterances are served from the speech cache.
+    """
+    backends = speech_selector.order(text)
+    for backend in backends:
+        data = speech_cache.get(text, backend.voice_key(), VOICE_PITCH, VOICE_RATE)
+        if data is not None:
+            return data
+
+    for backend in backends:
+        start = time.perf_counter()
+        try:
+            data = await backend.synthesize(text, VOICE_PITCH, VOICE_RATE)
+        except Exception as e:
+            logger.warning(f"Speech backend {backend.name} failed: {e}")
+            speech_selector.record_failure(backend)
+            continue
+        if not data:
+            speech_selector.record_failure(backend)
+            continue
+        speech_selector.record(backend, text, time.perf_counter() - start)
+        speech_cache.put(text, backend.voice_key(), VOICE_PITCH, VOICE_RATE, data)
+        return data
+
+    raise RuntimeError("No speech backend could synthesize the text")
+
+async def TextToAudioFile(text: str, file_path: str = 'data.mp3') -> None:
+    """Converts text to an audio file. Playback does not need this; it takes the bytes directly."""
     if os.path.exists(file_path):
         os.remove(file_path)
-    communicate = edge_tts.Communicate(text, os.environ['AssistantVoice'], pitch='+5Hz', rate='+22%')
-    await communicate.save(file_path)
+    data = await TextToAudioBytes(text)
+    with open(file_path, 'wb') as f:
+        f.write(data)
+
+def _synthesize_sentence(text: str) -> bytes:
+    """Synthesizes one sentence to in-memory MP3 bytes."""
+    return run_coroutine(TextToAudioBytes(text))
+
+def _wait_for_playback(handle, func, start: float, mode: str) -> None:
+    """
+    Waits for a playback handle, polling func and recording time-to-first-audio. Once all audio
+    is added, playback must end within the clip length plus PLAYBACK_MARGIN, counted from when it
+    started, or while it is still queued, from when the audio ahead of it should have finished.
+    Otherwise it is given up.
+    """
+    measured = False
+    closed_at = None
+    while True:
+        finished = handle.done.wait(0.05)
+        if not measured and handle.started.is_set():
+            tts_metrics[mode].append(handle.started_at - start)
+            logger.info(f"Time to first audio ({mode}): {tts_metrics[mode][-1]:.3f}s")
+            measured = True
+        if finished:
+            return
+        if not func():
+            handle.cancel()
+
+        if handle.closed and closed_at is None:
+            closed_at = time.perf_counter()
+        if closed_at is not None:
+            if handle.started.is_set():
+                starts = max(closed_at, handle.started_at)
+            else:
+                starts = max(closed_at, handle.player.queued_until(handle) or closed_at)
+            deadline = starts + handle.duration + PLAYBACK_MARGIN
+            if time.perf_counter() > deadline:
+                logger.error(f"Playback did not finish within {handle.duration + PLAYBACK_MARGIN:.1f}s; giving up")
+                handle.cancel()
+                return
+
+class SpeechPipeline:
+    """
+    Speaks sentences as they are handed in. Up to `depth` sentences are synthesized
+    ahead on the shared event loop while earlier ones play back to back on the audio player.
+    """
+
+    def __init__(self, func=lambda r=None: True, depth: int = None, priority: int = PRIORITY_SPEECH):
+        self.func = func
+        self.depth = max(1, depth or TTS_PIPELINE_DEPTH)
+        self.start = time.perf_counter()
+
+        self._sentences = queue.Queue()
+        self._audio = queue.Queue(maxsize=self.depth)
+        self._stopped = threading.Event()
+        self._handle = audio_player.open_stream(priority)
+
+        self._synth_thread = threading.Thread(target=self._synthesize_loop, daemon=True)
+        self._play_thread = threading.Thread(target=self._play_loop, daemon=True)
+        self._synth_thread.start()
+        self._play_thread.start()
+
+    def speak(self, sentence: str) -> None:
+        """Queues a sentence for synthesis and playback."""
+        if sentence.strip():
+            self._sentences.put(sentence.strip())
+
+    def close(self) -> None:
+        """Marks the end of input; queued sentences are still spoken."""
+        self._sentences.put(None)
+
+    def wait(self) -> None:
+        """Blocks until everything queued has been spoken or playback was stopped."""
+        self._play_thread.join()
+        self._synth_thread.join()
+
+    def _synthesize_loop(self) -> None:
+        while True:
+            sentence = self._sentences.get()
+            if sentence is None or self._stopped.is_set():
+                self._audio.put(None)
+                return
+            # Blocks while `depth` sentences are already synthesized ahead
+            self._audio.put(submit(TextToAudioBytes(sentence)))
+
+    def _play_loop(self) -> None:
+        try:
+            while not self._handle.cancelled:
+                if not self.func():
+                    self._handle.cancel()
+                    break
+                try:
+                    future = self._audio.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if future is None:
+                    break
+                try:
+                    self._handle.add(future.result())
+                except Exception as e:
+                    logger.error(f"Speech synthesis failed: {e}")
+
+            self._handle.close()
+            _wait_for_playback(self._handle, self.func, self.start, 'streaming')
+        finally:
+            self._stopped.set()
+            # Drop sentences and audio queued ahead so the synthesis thread can exit
+            while True:
+                try:
+                    self._sentences.get_nowait()
+                except queue.Empty:
+                    break
+            self._sentences.put(None)
+            while True:
+                try:
+                    future = self._audio.get(timeout=0.1)
+                except queue.Empty:
+                    if not self._synth_thread.is_alive():
+                        break
+                    continue
+                if future is None:
+                    break
+                future.cancel()
+
+class SpeechStream:
+    """
+    Turns streamed LLM tokens into speech sentence by sentence while the model keeps generating.
+    Long answers are cut after two sentences followed by a pointer to the chat screen, as TTS does.
+    """
+
+    def __init__(self, func=lambda r=None: True):
+        self.text = ''
+        self._buffer = ''
+        self._spoken = 0
+        self._held: List[str] = []
+        self._truncated = False
+        self._pipeline = SpeechPipeline(func)
+
+    def feed(self, token: str) -> None:
+        """Adds a token; every completed sentence is sent to the speech pipeline."""
+        self.text += token
+        self._buffer += token
+        parts = SENTENCE_BOUNDARY.split(self._buffer)
+        self._buffer = parts.pop()
+        for sentence in parts:
+            self._emit(sentence)
+
+    def _emit(self, sentence: str) -> None:
+        if self._truncated or not sentence.strip():
+            return
+
+        if self._spoken < 2:
+            self._pipeline.speak(sentence)
+            self._spoken += 1
+        else:
+            # Held back until we know whether the answer is long enough to be cut
+            self._held.append(sentence)
+
+        if len(self.text.split('.')) > 4 and len(self.text) >= 250:
+            self._truncated = True
+            self._held.clear()
+            self._pipeline.speak(random.choice(CHAT_SCREEN_RESPONSES))
+
+    def close(self, final_text: str = None) -> None:
+        """
+        Flushes the last sentence and blocks until speech finishes. When no tokens were
+        streamed (cached or fallback answers) the final text is spoken instead.
+        """
+        if not self.text and final_text:
+            self.feed(final_text)
+        self._emit(self._buffer)
+        self._buffer = ''
+        for sentence in self._held:
+            self._pipeline.speak(sentence)
+        self._held.clear()
+        self._pipeline.close()
+        self._pipeline.wait()
+
+def StreamingTextToSpeech(text: str, func=lambda r=None: True) -> None:
+    """
+    Plays text sentence by sentence, synthesizing up to TTS_PIPELINE_DEPTH sentences ahead
+    so audio starts as soon as the first sentence is ready.
+    """
+    pipeline = SpeechPipeline(func)
+    for sentence in split_sentences(text):
+        pipeline.speak(sentence)
+    pipeline.close()
+    pipeline.wait()
 
 def TextToSpeech(text: str, func=lambda r=None: True) -> None:
-    """Plays the converted text audio file."""
-    try:
-        asyncio.run(TextToAudioFile(text))
-        pygame.mixer.init()
-        pygame.mixer.music.load('data.mp3')
-        pygame.mixer.music.play()
-        while pygame.mixer.music.get_busy():
-            if not func():
-                break
-            pygame.time.Clock().tick(10)
-    finally:
-        pygame.mixer.music.stop()
-        pygame.mixer.quit()
+    """Synthesizes the text in memory and plays it."""
+    if TTS_STREAMING:
+        StreamingTextToSpeech(text, func)
+        return
+
+    start = time.perf_counter()
+    data = run_coroutine(TextToAudioBytes(text))
+    if not func():
+        return
+    handle = audio_player.play(data)
+    _wait_for_playback(handle, func, start, 'whole')
+
+def CompareTimeToFirstAudio(text: str) -> dict:
+    """
+    Measures time-to-first-audio of the whole-text path against the streaming path
+    (synthesis only, no playback).
+    """
+    start = time.perf_counter()
+    run_coroutine(TextToAudioBytes(text))
+    whole = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _synthesize_sentence(split_sentences(text)[0])
+    streaming = time.perf_counter() - start
+
+    return {'whole': whole, 'streaming': streaming, 'speedup': whole / streaming if streaming else None}
+
+def CachedSpeech(text: str) -> Optional[bytes]:
+    """Returns pre-synthesized audio for the text from any backend without synthesizing, or None."""
+    for backend in speech_selector.order(text):
+        if speech_cache.contains(text, backend.voice_key(), VOICE_PITCH, VOICE_RATE):
+            return speech_cache.get(text, backend.voice_key(), VOICE_PITCH, VOICE_RATE)
+    return None
+
+def RegisterFrequentPhrases(phrases: List[str]) -> None:
+    """Adds fixed utterances to be pre-synthesized at startup."""
+    for phrase in phrases:
+        if phrase not in FREQUENT_PHRASES:
+            FREQUENT_PHRASES.append(phrase)
+
+def PrewarmSpeechCache(phrases: List[str] = None) -> threading.Thread:
+    """Synthesizes frequent phrases into the speech cache on a background thread."""
+    def run():
+        if not speech_selector.usable():
+            return
+        for phrase in list(phrases or FREQUENT_PHRASES):
+            # Streaming mode caches per sentence
+            for unit in (split_sentences(phrase) if TTS_STREAMING else [phrase]):
+                if CachedSpeech(unit) is not None:
+                    continue
+                try:
+                    run_coroutine(TextToAudioBytes(unit))
+                except Exception as e:
+                    logger.warning(f"Could not pre-synthesize '{unit}': {e}")
+                    return
+        logger.info(f"Speech cache warm: {speech_cache.stats()}")
+
+    thread = threading.Thread(target=run, name='speech-cache-prewarm', daemon=True)
+    thread.start()
+    return thread
 
 def TTS(text: str, func=lambda r=None: True) -> None:
     """Handles TTS for long texts by splitting and adding additional instructions."""
-    responses = [
-        'The rest of the result has been printed to the chat screen, kindly check it out.',
-        'You can see the rest of the text on the chat screen.',
-        'The remaining part of the text is now on the chat screen.',
-        "You'll find more text on the chat screen.",
-        'Please check the chat screen for additional text.'
-    ]
-    
     data = text.split('.')
     if len(data) > 4 and len(text) >= 250:
-        prompt = ' '.join(data[:2]) + '. ' + random.choice(responses)
+        prompt = ' '.join(data[:2]) + '. ' + random.choice(CHAT_SCREEN_RESPONSES)
         TextToSpeech(prompt, func)
     else:
         TextToSpeech(text, func)
@@ -60,4 +366,7 @@ def print_slow_and_speak(text: str, delay: float = 0.05) -> None:
 if __name__ == '__main__':
     while True:
         user_input = input('Enter the text: ')
+        if user_input.startswith('compare '):
+            print(CompareTimeToFirstAudio(user_input.removeprefix('compare ')))
+            continue
         TTS(user_input)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Speech Pipeline Benchmark
+Measures time-to-first-audio, synthesis real-time factor and end-of-text-to-end-of-audio
+offline, with a stub synthesis backend and a null audio sink
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import wave
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+from statistics import median
+from typing import Dict, List, Optional
+
+from . import TTS
+from .AudioPlayer import AudioPlayer
+from .SpeechCache import SpeechCache
+from .SpeechBackends import SpeechBackend, BackendSelector
+
+SAMPLE_RATE = 8000
+
+BENCHMARK_TEXTS = {
+    'short': "Sure, opening Chrome now.",
+    'medium': ("The weather in Hyderabad is clear with a high of thirty one degrees. "
+               "There is no rain expected today. Winds are light from the west."),
+    'long': ("Photosynthesis is the process plants use to turn light into chemical energy. "
+             "It takes place mostly in the leaves, inside small structures called chloroplasts. "
+             "Chlorophyll absorbs red and blue light and reflects green, which is why leaves look green. "
+             "The plant combines carbon dioxide from the air with water from the soil. "
+             "The result is glucose, which stores energy, and oxygen, which is released. "
+             "Almost all life on Earth depends on this process, directly or indirectly. "
+             "It is also the main source of the oxygen in our atmosphere."),
+}
+
+
+def silent_wav(seconds: float) -> bytes:
+    """A mono 16-bit WAV of silence of the given duration."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(b'\0\0' * int(seconds * SAMPLE_RATE))
+    return buffer.getvalue()
+
+
+def wav_duration(data: bytes) -> float:
+    with wave.open(io.BytesIO(data), 'rb') as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+class StubBackend(SpeechBackend):
+    """
+    Stands in for the network engine: waits latency + per_char * len(text) and returns
+    canned silence lasting audio_per_char * len(text) seconds.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency: float = 0.3, per_char: float = 0.002, audio_per_char: float = 0.065):
+        self.latency = latency
+        self.per_char = per_char
+        self.audio_per_char = audio_per_char
+        self.synth_seconds = 0.0
+        self.audio_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return True
+
+    def voice_key(self) -> str:
+        return f'stub:{self.latency}:{self.per_char}:{self.audio_per_char}'
+
+    async def synthesize(self, text: str, pitch: str, rate: str) -> bytes:
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency + self.per_char * len(text))
+        data = silent_wav(self.audio_per_char * len(text))
+        with self._lock:
+            self.synth_seconds += time.perf_counter() - start
+            self.audio_seconds += wav_duration(data)
+        return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self.synth_seconds = 0.0
+            self.audio_seconds = 0.0
+
+
+class NullSink:
+    """
+    Audio sink that plays nothing but keeps the timing of a mixer channel: a sound is busy
+    for its duration (divided by speed) and a queued sound starts when the current one ends.
+    """
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self._playing: Dict[str, float] = {}  # channel -> end time
+        self._queued: Dict[str, Optional[float]] = {}  # channel -> queued duration
+
+    def open(self) -> None:
+        self._playing = {'main': 0.0, 'overlay': 0.0}
+        self._queued = {'main': None, 'overlay': None}
+
+    def close(self) -> None:
+        pass
+
+    def decode(self, data: bytes) -> float:
+        return wav_duration(data) / self.speed
+
+    def length(self, sound: float) -> float:
+        return sound
+
+    def play(self, channel: str, sound: float) -> None:
+        self._playing[channel] = time.perf_counter() + sound
+        self._queued[channel] = None
+
+    def queue(self, channel: str, sound: float) -> None:
+        self._queued[channel] = sound
+
+    def busy(self, channel: str) -> bool:
+        now = time.perf_counter()
+        if now >= self._playing[channel] and self._queued[channel] is not None:
+            self._playing[channel] += self._queued[channel]
+            self._queued[channel] = None
+        return now < self._playing[channel]
+
+    def has_queued(self, channel: str) -> bool:
+        return self._queued[channel] is not None
+
+    def stop(self, channel: str) -> None:
+        self._playing[channel] = 0.0
+        self._queued[channel] = None
+
+    def set_volume(self, channel: str, volume: float) -> None:
+        pass
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """Median, 95th percentile, min and max of the samples."""
+    if not values:
+        return {'median': None, 'p95': None, 'min': None, 'max': None}
+    ordered = sorted(values)
+    return {
+        'median': round(median(ordered), 4),
+        'p95': round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 4),
+        'min': round(ordered[0], 4),
+        'max': round(ordered[-1], 4),
+    }
+
+
+def run_case(text: str, mode: str, backend: StubBackend, player: AudioPlayer) -> Dict[str, float]:
+    """Speaks the text once through the TTS path and returns its measurements."""
+    metric = 'streaming' if mode == 'pipelined' else 'whole'
+    samples_before = len(TTS.tts_metrics[metric])
+    underruns_before = player.underruns
+    backend.reset()
+
+    start = time.perf_counter()
+    if mode == 'pipelined':
+        TTS.StreamingTextToSpeech(text)
+    else:
+        TTS.TextToSpeech(text)
+    end_to_end = time.perf_counter() - start
+
+    ttfa = TTS.tts_metrics[metric][-1] if len(TTS.tts_metrics[metric]) > samples_before else None
+    return {
+        'ttfa': ttfa,
+        'end_to_end': end_to_end,
+        'rtf': backend.synth_seconds / backend.audio_seconds if backend.audio_seconds else 0.0,
+        'underruns': player.underruns - underruns_before,
+    }
+
+
+def run_benchmark(runs: int = 3, latency: float = 0.3, per_char: float = 0.002,
+                  audio_per_char: float = 0.065, playback_speed: float = 10.0,
+                  depth: int = None, texts: Dict[str, str] = None) -> dict:
+    """
+    Runs every text size in whole-text and pipelined mode, with the speech cache off and on
+    (warmed by one unrecorded run), and returns the results.
+    """
+    texts = texts or BENCHMARK_TEXTS
+    backend = StubBackend(latency, per_char, audio_per_char)
+    player = AudioPlayer(NullSink(playback_speed))
+    cache_dir = tempfile.mkdtemp(prefix='tts-benchmark-')
+
+    # Route the TTS module through the stub backend, the null sink and a private cache
+    saved = (TTS.audio_player, TTS.speech_selector, TTS.speech_cache, TTS.TTS_STREAMING, TTS.TTS_PIPELINE_DEPTH)
+    TTS.audio_player = player
+    TTS.speech_selector = BackendSelector([backend], preference='stub')
+    TTS.TTS_STREAMING = False
+    if depth:
+        TTS.TTS_PIPELINE_DEPTH = depth
+
+    results = []
+    try:
+        for size, text in texts.items():
+            for mode in ('whole', 'pipelined'):
+                for cache in (False, True):
+                    TTS.speech_cache = SpeechCache(os.path.join(cache_dir, f'{size}-{mode}-{cache}'))
+                    TTS.speech_cache.enabled = cache
+                    if cache:
+                        run_case(text, mode, backend, player)
+
+                    samples = [run_case(text, mode, backend, player) for _ in range(runs)]
+                    results.append({
+                        'text': size,
+                        'chars': len(text),
+                        'sentences': len(TTS.split_sentences(text)),
+                        'mode': mode,
+                        'cache': cache,
+                        'runs': runs,
+                        'ttfa': summarize([s['ttfa'] for s in samples if s['ttfa'] is not None]),
+                        'rtf': summarize([s['rtf'] for s in samples]),
+                        'end_to_end': summarize([s['end_to_end'] for s in samples]),
+                        'underruns': sum(s['underruns'] for s in samples),
+                    })
+                    print(f"{size:>6} {mode:>9} cache={'on ' if cache else 'off'} "
+                          f"ttfa={results[-1]['ttfa']['median']}s end_to_end={results[-1]['end_to_end']['median']}s "
+                          f"rtf={results[-1]['rtf']['median']}")
+    finally:
+        player.shutdown()
+        TTS.audio_player, TTS.speech_selector, TTS.speech_cache, TTS.TTS_STREAMING, TTS.TTS_PIPELINE_DEPTH = saved
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': {'python': sys.version.split()[0], 'system': platform.platform()},
+        'config': {
+            'runs': runs,
+            'stub_latency': latency,
+            'stub_per_char': per_char,
+            'audio_per_char': audio_per_char,
+            'playback_speed': playback_speed,
+            'pipeline_depth': depth or saved[4],
+        },
+        'results': results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Offline benchmark of the speech pipeline')
+    parser.add_argument('--runs', type=int, default=3, help='recorded runs per case')
+    parser.add_argument('--latency', type=float, default=0.3, help='stub synthesis latency per request (s)')
+    parser.add_argument('--per-char', type=float, default=0.002, help='extra stub latency per character (s)')
+    parser.add_argument('--audio-per-char', type=float, default=0.065, help='audio produced per character (s)')
+    parser.add_argument('--playback-speed', type=float, default=10.0,
+                        help='null sink plays this many times faster than real time')
+    parser.add_argument('--depth', type=int, default=None, help='pipeline depth (default TTS_PIPELINE_DEPTH)')
+    parser.add_argument('--output', default='tts_benchmark.json')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.runs, args.latency, args.per_char, args.audio_per_char,
+                           args.playback_speed, args.depth)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
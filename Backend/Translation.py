@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Query Translation
+Local language identification, an LRU translation cache and batched translation of long inputs
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import mtranslate as mt
+from dotenv import load_dotenv
+
+from .Replay import transport
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', '512'))
+TRANSLATION_BATCH_CHARS = int(os.getenv('TRANSLATION_BATCH_CHARS', '400'))  # longer inputs are split
+NON_LATIN_THRESHOLD = 0.2  # share of letters outside Latin script that marks text as not English
+
+# Common function words. Text with any of the foreign ones is English only when English ones
+# strictly outnumber them ("gold price batao" is a tie and gets translated); short commands
+# with none of either ("open chrome") count as English.
+ENGLISH_WORDS = {
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'to', 'of', 'in', 'on', 'at', 'for', 'with',
+    'and', 'or', 'but', 'not', 'what', 'who', 'when', 'where', 'why', 'how', 'which', 'this', 'that',
+    'it', 'i', 'you', 'me', 'my', 'your', 'we', 'do', 'does', 'did', 'can', 'could', 'will', 'would',
+    'please', 'tell', 'open', 'close', 'play', 'search', 'today', 'price', 'weather', 'about', 'from',
+    'have', 'has', 'there', 'some', 'much', 'many', 'time', 'now', 'should', 'show', 'give',
+}
+FOREIGN_WORDS = {
+    # Romanized Hindi / Urdu
+    'kya', 'hai', 'hain', 'ho', 'kaise', 'kaisa', 'kab', 'kahan', 'kyun', 'kyon', 'mera', 'meri', 'mere',
+    'tum', 'tumhara', 'aap', 'aapka', 'mujhe', 'ka', 'ki', 'ke', 'ko', 'se', 'par', 'aur', 'nahi',
+    'nahin', 'karo', 'kar', 'do', 'batao', 'bolo', 'chalao', 'kholo', 'band', 'abhi', 'aaj', 'kal', 'kitna',
+    'kitne', 'wala', 'wali', 'haan', 'ji', 'yeh', 'woh', 'bhi', 'sirf', 'dikhao', 'sunao', 'chahiye',
+    # Spanish, French, German, Portuguese, Italian
+    'el', 'la', 'los', 'las', 'es', 'que', 'por', 'para', 'como', 'qué', 'cómo', 'está', 'y', 'de', 'del',
+    'le', 'les', 'est', 'et', 'un', 'une', 'des', 'pour', 'quel', 'quelle', 'avec', 'der', 'die', 'das',
+    'ist', 'und', 'nicht', 'wie', 'was', 'wo', 'ich', 'bitte', 'não', 'você', 'o', 'che', 'il', 'per',
+}
+# Words that are also English ('do', 'was') must not decide either way
+FOREIGN_WORDS -= ENGLISH_WORDS
+
+WORD = re.compile(r"[^\W\d_]+")
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?।])\s+')
+
+
+def is_english(text: str) -> bool:
+    """
+    Cheap local language ID: letters outside Latin script mean another language; otherwise
+    English function words have to strictly outnumber those of romanized Hindi and European
+    languages whenever any of the latter appear.
+    """
+    letters = [char for char in text if char.isalpha()]
+    if not letters:
+        return True
+    non_latin = sum(1 for char in letters if ord(char) > 0x24F)
+    if non_latin / len(letters) >= NON_LATIN_THRESHOLD:
+        return False
+    if any(ord(char) > 0x7F for char in letters):
+        # Accented Latin letters (é, ñ, ü, ã) are rare in English queries
+        return False
+
+    words = [word.lower() for word in WORD.findall(text)]
+    english = sum(1 for word in words if word in ENGLISH_WORDS)
+    foreign = sum(1 for word in words if word in FOREIGN_WORDS)
+    return foreign == 0 or english > foreign
+
+
+def split_batches(text: str, max_chars: int = None) -> List[str]:
+    """Splits long text at sentence boundaries into pieces of at most max_chars (longer sentences stay whole)."""
+    max_chars = max_chars or TRANSLATION_BATCH_CHARS
+    if len(text) <= max_chars:
+        return [text]
+
+    batches, current = [], ''
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            batches.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        batches.append(current)
+    return batches
+
+
+class Translator:
+    """
+    Translates text to English only when it is not English already. Results are kept in an
+    LRU cache keyed by the normalized text; long inputs are split into sentence batches that
+    are looked up, and translated, independently and concurrently.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or TRANSLATION_CACHE_SIZE
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='translate')
+
+        self.skipped = 0
+        self.hits = 0
+        self.translated = 0
+        self.translate_time = 0.0
+
+    def _cached(self, key: str):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+        return None
+
+    def _store(self, key: str, translation: str) -> None:
+        with self._lock:
+            self._cache[key] = translation
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _translate_batch(self, batch: str) -> str:
+        if is_english(batch):
+            with self._lock:
+                self.skipped += 1
+            return batch
+
+        key = ' '.join(batch.lower().split())
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        translation = transport.call('mtranslate', {'text': batch}, lambda: mt.translate(batch, 'en', 'auto'))
+        with self._lock:
+            self.translated += 1
+            self.translate_time += time.perf_counter() - start
+        self._store(key, translation)
+        return translation
+
+    def to_english(self, text: str) -> str:
+        """English version of the text; English input is returned untouched without a network call."""
+        batches = split_batches(text)
+        if len(batches) == 1:
+            return self._translate_batch(batches[0])
+        return ' '.join(self._executor.map(self._translate_batch, batches))
+
+    def stats(self) -> Dict[str, float]:
+        """Translations skipped as English, served from the cache and sent to the network."""
+        with self._lock:
+            return {
+                'skipped': self.skipped,
+                'cache_hits': self.hits,
+                'translated': self.translated,
+                'average_translate_time': self.translate_time / self.translated if self.translated else None,
+                'cache_entries': len(self._cache),
+            }
+
+
+# Global instance
+translator = Translator()
+
+
+if __name__ == '__main__':
+    samples = [
+        "What is the gold price today",
+        "open chrome",
+        "aaj ka mausam kaisa hai",
+        "gold price batao",
+        "मुझे आज का मौसम बताओ",
+        "¿Qué hora es?",
+        "Wie ist das Wetter heute",
+        "play despacito on youtube",
+    ]
+    for sample in samples:
+        print(f"{'english' if is_english(sample) else 'translate':>9}  {sample}")
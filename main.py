@@ -1,12 +1,11 @@
 import os
 import json
 import threading
-import asyncio
 import base64
+import time
 from time import sleep
 from random import choice
 import pyautogui
-import mtranslate as mt
 import eel
 from dotenv import load_dotenv, set_key
 from threading import Lock
@@ -18,8 +17,15 @@ from Backend.RSE import RealTimeChatBotAI, GoogleSearch
 from Backend.Chatbot import ChatBotAI
 from Backend.AutoModel import Model
 from Backend.ChatGpt import ChatBotAI as ChatGptAI
-from Backend.TTS import TTS
+from Backend.TTS import TTS, SpeechStream, PrewarmSpeechCache
 from Backend.Email import send_email, set_receiver_email, set_email_subject, set_email_body, process_email_voice_input
+from Backend.ConnectionPool import start_connection_warmup
+from Backend.Acknowledgment import acknowledger
+from Backend.AudioPlayer import audio_player
+from Backend.Cancellation import CancellationToken, QueryCancelled
+from Backend.EventLoop import run_coroutine
+from Backend.Prefetch import prefetcher
+from Backend.Translation import translator
 from Backend.SystemCommands import check_battery_status, shutdown_laptop, restart_laptop, read_recent_emails, create_gui, get_location_info, get_weather
 
 # Load environment variables
@@ -38,27 +44,43 @@ Assistantname = os.environ['AssistantName']
 Username = os.environ['NickName']
 lock = Lock()
 
+# Speak general answers sentence by sentence while the model is still generating
+TTS_OVERLAP_GENERATION = os.getenv('TTS_OVERLAP_GENERATION', 'false').lower() == 'true'
+
+# Barge-in: the query in flight is cancelled by a new utterance or a stop command
+STOP_COMMANDS = {'stop', 'stop it', 'cancel', 'quiet', 'be quiet', 'shut up', 'enough', 'that is enough'}
+DUPLICATE_WINDOW = 1.5  # seconds; the restarting recognizer can fire the same transcript twice
+current_query: CancellationToken | None = None
+last_transcription = ('', 0.0)
+
 def UniversalTranslator(Text: str) -> str:
-    """Translates text to English."""
-    return mt.translate(Text, 'en', 'auto').capitalize()
+    """Translates text to English (skipped when it already is, cached otherwise)."""
+    return translator.to_english(Text).capitalize()
 
-def MainExecution(Query: str):
+def MainExecution(Query: str, token: CancellationToken = None):
     """Main execution function for handling user queries."""
     global WEBCAM, state
+    token = token or CancellationToken()
     print(f"Processing query: {Query}")
+    # Short spoken cue while slow work runs, skipped if the answer comes first
+    acknowledger.start(Query)
     Query = UniversalTranslator(Query) if 'en' not in InputLanguage.lower() else Query.capitalize()
     Query = QueryModifier(Query)
     print(f"Modified query: {Query}")
+    # Routine lookups (gold, USD to INR, weather, inbox) teach the prefetcher when to warm them
+    prefetcher.record(Query)
 
     if state != 'Available...':
         print("State not available, returning")
+        acknowledger.finish()
         return
     state = 'Thinking...'
-    print("Calling Model...")
-    Decision = Model(Query)
-    print(f"Decision: {Decision}")
 
     try:
+        print("Calling Model...")
+        Decision = Model(Query, cancel_token=token)
+        print(f"Decision: {Decision}")
+
         if 'general' in Decision or 'realtime' in Decision:
             print("General or realtime query")
             if Decision[0] == 'general':
@@ -66,12 +88,17 @@ def MainExecution(Query: str):
                 if WEBCAM:
                     python_call_to_capture()
                     sleep(0.5)
-                    Answer = AnswerModifier(ChatBotAI(Query))  # Changed to use Groq instead of Tune Studio
+                if TTS_OVERLAP_GENERATION:
+                    speech = SpeechStream(token)
+                    Answer = AnswerModifier(ChatBotAI(Query, on_token=speech.feed, cancel_token=token))  # Changed to use Groq instead of Tune Studio
+                    print(f"Answer: {Answer}")
+                    state = 'Answering...'
+                    speech.close(Answer)
                 else:
-                    Answer = AnswerModifier(ChatBotAI(Query))
-                print(f"Answer: {Answer}")
-                state = 'Answering...'
-                TTS(Answer)
+                    Answer = AnswerModifier(ChatBotAI(Query, cancel_token=token))  # Changed to use Groq instead of Tune Studio
+                    print(f"Answer: {Answer}")
+                    state = 'Answering...'
+                    TTS(Answer, token)
                 print("TTS called")
                 messages.append({'role': 'assistant', 'content': Answer})
                 with open('ChatLog.json', 'w') as f:
@@ -79,10 +106,10 @@ def MainExecution(Query: str):
             else:
                 print("Realtime query")
                 state = 'Searching...'
-                Answer = AnswerModifier(RealTimeChatBotAI(Query))
+                Answer = AnswerModifier(RealTimeChatBotAI(Query, cancel_token=token))
                 print(f"Realtime Answer: {Answer}")
                 state = 'Answering...'
-                TTS(Answer)
+                TTS(Answer, token)
                 print("Realtime TTS called")
                 messages.append({'role': 'assistant', 'content': Answer})
                 with open('ChatLog.json', 'w') as f:
@@ -107,10 +134,11 @@ def MainExecution(Query: str):
             print(f"Searching for: {topic}")
             state = 'Searching...'
             search_results = GoogleSearch(topic)
+            token.raise_if_cancelled()
             Answer = AnswerModifier(search_results)
             print(f"Search Answer: {Answer}")
             state = 'Answering...'
-            TTS(Answer)
+            TTS(Answer, token)
             print("Search TTS called")
             messages.append({'role': 'assistant', 'content': Answer})
             with open('ChatLog.json', 'w') as f:
@@ -182,17 +210,23 @@ def MainExecution(Query: str):
         else:
             print("Automation query")
             state = 'Automation...'
-            response = asyncio.run(Automation(Decision))
+            response = run_coroutine(Automation(Decision))
+            token.raise_if_cancelled()
             print(f"Automation response: {response}")
             state = 'Answering...'
             messages.append({'role': 'assistant', 'content': response})
             with open('ChatLog.json', 'w') as f:
                 json.dump(messages, f, indent=4)
-            TTS(response)
+            TTS(response, token)
             print("Automation TTS called")
+    except QueryCancelled:
+        print(f"Query cancelled: {Query}")
     finally:
-        state = 'Listening...'
-        print("State set to Listening")
+        # A cancelled query must not reset state owned by the query that replaced it
+        if not token.cancelled:
+            acknowledger.finish()
+            state = 'Listening...'
+            print("State set to Listening")
 
 def js_messages():
     """Fetches new messages to update the GUI."""
@@ -215,17 +249,33 @@ def js_state(stat=None):
 def js_mic(transcription):
     """Handles microphone input."""
     print(transcription)
-    global state
+    global state, current_query, last_transcription
     
     # Check if email composition is active
     if process_email_voice_input(transcription):
         return  # Voice input was processed for email composition
-    
+
+    # Ignore the same transcript fired twice by the restarting recognizer
+    previous, previous_at = last_transcription
+    if transcription == previous and time.time() - previous_at < DUPLICATE_WINDOW:
+        return
+    last_transcription = (transcription, time.time())
+
+    # Barge-in: tear down the query in flight (LLM stream, search, synthesis, playback)
+    if current_query:
+        current_query.cancel()
+    audio_player.stop_all()
+    working[:] = [thread for thread in working if thread.is_alive()]
+
+    if transcription.strip().lower().strip('.!?') in STOP_COMMANDS:
+        state = 'Listening...'
+        return
+
     state = 'Available...'  # Reset state to allow processing
-    if not working or not working[0].is_alive():
-        work = threading.Thread(target=MainExecution, args=(transcription,), daemon=True)
-        work.start()
-        working.append(work)
+    current_query = CancellationToken()
+    work = threading.Thread(target=MainExecution, args=(transcription, current_query), daemon=True)
+    work.start()
+    working.append(work)
 
 def python_call_to_start_video():
     """Starts the video capture."""
@@ -280,6 +330,15 @@ def js_capture(image_data):
     with open('capture.png', 'wb') as f:
         f.write(image_bytes)
 
+# Open provider connections in the background so the first query is as fast as later ones
+start_connection_warmup()
+
+# Pre-synthesize the welcome line, canned responses and fixed helper messages
+PrewarmSpeechCache()
+
+# Fetch routine live lookups in the background shortly before they are usually asked for
+prefetcher.start()
+
 # Initialize Eel and start the application
 eel.init('web')
 print("Eel initialized, starting server...")